@@ -0,0 +1,16 @@
+from django.urls import path
+
+from recipe.async_views import (ingredient_detail, ingredient_list,
+                                recipe_detail, recipe_list, tag_detail,
+                                tag_list)
+
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path("api/tags/", tag_list),
+    path("api/tags/<int:pk>/", tag_detail),
+    path("api/ingredients/", ingredient_list),
+    path("api/ingredients/<int:pk>/", ingredient_detail),
+    path("api/recipes/", recipe_list),
+    path("api/recipes/<int:pk>/", recipe_detail),
+] + sync_urlpatterns
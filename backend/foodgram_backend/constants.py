@@ -3,3 +3,26 @@ UNIT_LENGTH: int = 20
 PAGINTAION_NUMBER: int = 6
 VALIDATOR_COUNT: int = 1
 REGISTRATION_NAME: int = 150
+INGREDIENT_SEARCH_LIMIT: int = 50
+INGREDIENT_INDEX_TTL: int = 300
+EXPORT_CHUNK_SIZE: int = 500
+RESPONSE_CACHE_TIMEOUT: int = 60 * 60
+RECIPE_DETAIL_CACHE_TIMEOUT: int = 24 * 60 * 60
+IMPORT_BATCH_SIZE: int = 5000
+RECIPES_LIMIT_MAX: int = 50
+THUMBNAIL_SIZE: int = 320
+BASE64_CHUNK_SIZE: int = 4 * 64 * 1024
+MATCH_RESULTS_LIMIT: int = 20
+MATCH_RESULTS_MAX: int = 100
+N_PLUS_ONE_THRESHOLD: int = 5
+SHOPPING_LIST_BATCH_SIZE: int = 1000
+BULK_RECIPES_MAX: int = 100
+FEED_MAX_ITEMS: int = 500
+FEED_BACKFILL: int = 50
+FEED_FANOUT_MAX_FOLLOWERS: int = 10000
+FEED_BIG_AUTHORS_TTL: int = 300
+SIMILAR_RECIPES_TOP_K: int = 20
+SIMILAR_RECIPES_MIN_COMMON: int = 2
+SIMILAR_RECIPES_BLOCK_SIZE: int = 1000
+SIMILAR_RECIPES_BLOCK_ENTRIES: int = 5_000_000
+RECOMMENDATION_SEED_FAVORITES: int = 50
@@ -0,0 +1,136 @@
+import asyncio
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.signals import request_started
+from django.db import connections
+
+PRIMARY = "default"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+PRIMARY_APPS = ("authtoken",)
+
+current_routing = ContextVar("current_routing", default=None)
+
+
+def check_connections(**kwargs):
+    """
+    Проверка живости постоянных соединений перед запросом: оборванное
+    соединение закрывается и открывается заново при первом обращении.
+    """
+    for connection in connections.all():
+        if (
+            connection.connection is not None
+            and not connection.in_atomic_block
+            and not connection.is_usable()
+        ):
+            connection.close()
+
+
+class RequestRouting:
+    """Выбор базы для чтения в рамках одного запроса."""
+
+    def __init__(self, request):
+        self.request = request
+        self.wrote = False
+        self.replica = None
+
+    def read_alias(self):
+        if self.wrote:
+            return PRIMARY
+        if self.replica is None:
+            self.replica = self.choose_replica()
+        return self.replica
+
+    def choose_replica(self):
+        request = self.request
+        resolver_match = getattr(request, "resolver_match", None)
+        if (
+            resolver_match is None
+            or request.method not in SAFE_METHODS
+            or settings.DB_REPLICA_PIN_COOKIE in request.COOKIES
+            or not getattr(
+                getattr(resolver_match.func, "cls", None),
+                "replica_reads",
+                False,
+            )
+        ):
+            return PRIMARY
+        return random.choice(settings.DATABASE_REPLICAS)
+
+
+class PrimaryReplicaRouter:
+    """
+    Чтение во вьюсетах с replica_reads = True идёт на реплику, всё
+    остальное, включая чтение после записи в том же запросе, на
+    основную базу.
+    """
+
+    def db_for_read(self, model, **hints):
+        routing = current_routing.get()
+        if routing is None or model._meta.app_label in PRIMARY_APPS:
+            return PRIMARY
+        return routing.read_alias()
+
+    def db_for_write(self, model, **hints):
+        routing = current_routing.get()
+        if routing is not None:
+            routing.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY
+
+
+class DatabaseRoutingMiddleware:
+    """
+    Хранит состояние маршрутизации запроса для PrimaryReplicaRouter
+    и после успешной записи ставит cookie, по которой следующие
+    запросы клиента DB_REPLICA_PIN_SECONDS секунд читают с основной
+    базы, пока реплики догоняют её.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if settings.DB_HEALTH_CHECKS:
+            request_started.connect(check_connections)
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        token = current_routing.set(RequestRouting(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            current_routing.reset(token)
+        return self.pin(request, response)
+
+    async def __acall__(self, request):
+        token = current_routing.set(RequestRouting(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_routing.reset(token)
+        return self.pin(request, response)
+
+    def pin(self, request, response):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            response.set_cookie(
+                settings.DB_REPLICA_PIN_COOKIE,
+                "1",
+                max_age=settings.DB_REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
@@ -0,0 +1,353 @@
+import asyncio
+import hmac
+import logging
+import threading
+from bisect import bisect_left
+from collections import Counter
+from contextvars import ContextVar
+from functools import wraps
+from time import perf_counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+from rest_framework import serializers
+
+from .constants import N_PLUS_ONE_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5,
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Управление транзакциями повторяется в каждом atomic() и не N+1.
+TRANSACTION_STATEMENTS = (
+    "BEGIN", "SAVEPOINT", "RELEASE", "COMMIT", "ROLLBACK",
+)
+
+current_request = ContextVar("current_request", default=None)
+
+
+def escape(value):
+    """Экранирование значения метки в текстовом формате Prometheus."""
+    return (
+        str(value).replace("\\", "\\\\").replace("\n", "\\n")
+        .replace('"', '\\"')
+    )
+
+
+def format_labels(labels):
+    return ",".join(f'{name}="{escape(value)}"' for name, value in labels)
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами и метками."""
+
+    kind = "histogram"
+
+    def __init__(self, name, description, labelnames, buckets):
+        self.name = name
+        self.description = description
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, labels, value):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [
+                [0] * (len(self.buckets) + 1), 0.0, 0
+            ]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def samples(self):
+        for labels, (counts, total, count) in sorted(self.series.items()):
+            labels = tuple(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, bucket in zip(
+                (*self.buckets, "+Inf"), counts
+            ):
+                cumulative += bucket
+                yield (
+                    f"{self.name}_bucket"
+                    f"{{{format_labels((*labels, ('le', bound)))}}}",
+                    cumulative,
+                )
+            yield f"{self.name}_sum{{{format_labels(labels)}}}", total
+            yield f"{self.name}_count{{{format_labels(labels)}}}", count
+
+
+class CounterMetric:
+    """Монотонный счётчик с метками."""
+
+    kind = "counter"
+
+    def __init__(self, name, description, labelnames):
+        self.name = name
+        self.description = description
+        self.labelnames = labelnames
+        self.series = Counter()
+
+    def inc(self, labels, value=1):
+        self.series[labels] += value
+
+    def samples(self):
+        for labels, value in sorted(self.series.items()):
+            labels = tuple(zip(self.labelnames, labels))
+            yield f"{self.name}{{{format_labels(labels)}}}", value
+
+
+class Registry:
+    """
+    Метрики запросов текущего процесса. При нескольких воркерах
+    gunicorn каждый отдаёт свои значения, Prometheus суммирует их
+    по меткам экземпляра.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = CounterMetric(
+            "foodgram_requests_total",
+            "Число обработанных запросов.",
+            ("view", "status"),
+        )
+        self.duration = Histogram(
+            "foodgram_request_duration_seconds",
+            "Полное время обработки запроса.",
+            ("view",),
+            DURATION_BUCKETS,
+        )
+        self.sql_duration = Histogram(
+            "foodgram_request_sql_duration_seconds",
+            "Время SQL-запросов за один запрос.",
+            ("view",),
+            DURATION_BUCKETS,
+        )
+        self.serializer_duration = Histogram(
+            "foodgram_request_serializer_duration_seconds",
+            "Время сериализации ответа.",
+            ("view",),
+            DURATION_BUCKETS,
+        )
+        self.queries = Histogram(
+            "foodgram_request_queries",
+            "Число SQL-запросов за один запрос.",
+            ("view",),
+            QUERY_BUCKETS,
+        )
+        self.n_plus_one = CounterMetric(
+            "foodgram_n_plus_one_total",
+            "Запросы с повторяющимися однотипными SQL-запросами.",
+            ("view",),
+        )
+        self.metrics = (
+            self.requests, self.duration, self.sql_duration,
+            self.serializer_duration, self.queries, self.n_plus_one,
+        )
+
+    def record(self, stats, status):
+        view = (stats.view,)
+        with self.lock:
+            self.requests.inc((stats.view, str(status)))
+            self.duration.observe(view, stats.total)
+            self.sql_duration.observe(view, stats.sql_time)
+            self.serializer_duration.observe(view, stats.serializer_time)
+            self.queries.observe(view, stats.queries)
+            if stats.repeated:
+                self.n_plus_one.inc(view)
+
+    def render(self):
+        lines = []
+        with self.lock:
+            for metric in self.metrics:
+                lines.append(f"# HELP {metric.name} {metric.description}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+                lines.extend(
+                    f"{name} {value}" for name, value in metric.samples()
+                )
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+class RequestStats:
+    """Замеры одного запроса."""
+
+    def __init__(self):
+        self.started = perf_counter()
+        self.view = "unresolved"
+        self.total = 0.0
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+        self.serializing = False
+        self.queries = 0
+        self.shapes = Counter()
+        self.repeated = ()
+
+    def finish(self, request):
+        resolver_match = getattr(request, "resolver_match", None)
+        if resolver_match is not None:
+            self.view = view_name(resolver_match.func, request.method.lower())
+        self.total = perf_counter() - self.started
+        self.repeated = [
+            (sql, count) for sql, count in self.shapes.items()
+            if count >= N_PLUS_ONE_THRESHOLD
+        ]
+
+    def server_timing(self):
+        return (
+            f'db;dur={self.sql_time * 1000:.1f};desc="{self.queries} queries",'
+            f" serializer;dur={self.serializer_time * 1000:.1f},"
+            f" total;dur={self.total * 1000:.1f}"
+        )
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Обёртка выполнения SQL. Замеры относятся к запросу из контекста,
+    поэтому учитываются и запросы из потоков sync_to_async.
+    """
+    stats = current_request.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.sql_time += perf_counter() - started
+        stats.queries += 1
+        if not sql.lstrip().upper().startswith(TRANSACTION_STATEMENTS):
+            stats.shapes[sql] += 1
+
+
+def install_query_wrapper(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def view_name(view_func, method):
+    """Имя представления вида RecipeViewSet.list."""
+    view_class = getattr(view_func, "cls", None)
+    if view_class is None:
+        view_class = getattr(view_func, "view_class", None)
+    if view_class is None:
+        return f"{view_func.__module__}.{view_func.__name__}"
+    actions = getattr(view_func, "actions", None) or {}
+    return f"{view_class.__name__}.{actions.get(method, method)}"
+
+
+def timed_serialization(func):
+    """
+    Замер времени сериализации верхнего уровня: вложенные вызовы
+    учитываются в объемлющем.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        stats = current_request.get()
+        if stats is None or stats.serializing:
+            return func(*args, **kwargs)
+        stats.serializing = True
+        started = perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stats.serializer_time += perf_counter() - started
+            stats.serializing = False
+
+    wrapper.instrumented = True
+    return wrapper
+
+
+def timed_data(prop):
+    """Замер времени свойства data у сериализатора."""
+    return property(timed_serialization(prop.fget))
+
+
+def instrument_serializers():
+    for serializer_class in (
+        serializers.Serializer, serializers.ListSerializer
+    ):
+        prop = serializer_class.__dict__["data"]
+        if not getattr(prop.fget, "instrumented", False):
+            serializer_class.data = timed_data(prop)
+
+
+class RequestMetricsMiddleware:
+    """
+    Для каждого запроса считает SQL-запросы, время SQL, сериализации
+    и всей обработки, пишет их в заголовок Server-Timing и в метрики
+    для /api/metrics/. Повторение одного и того же SQL не меньше
+    N_PLUS_ONE_THRESHOLD раз отмечается как N+1. Работает и под WSGI,
+    и под ASGI.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_METRICS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+        connection_created.connect(install_query_wrapper)
+        for connection in connections.all():
+            install_query_wrapper(None, connection)
+        # Подмена Serializer.data затрагивает все сериализаторы
+        # процесса, поэтому включается только для отладки; быстрые
+        # сериализаторы замеряются всегда.
+        if settings.SERIALIZER_METRICS:
+            instrument_serializers()
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = current_request.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_request.reset(token)
+        return self.finish(request, response, stats)
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = current_request.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_request.reset(token)
+        return self.finish(request, response, stats)
+
+    def finish(self, request, response, stats):
+        stats.finish(request)
+        registry.record(stats, response.status_code)
+        for sql, count in stats.repeated:
+            logger.warning(
+                "Возможный N+1 в %s: %s раз %s", stats.view, count, sql[:200]
+            )
+        if settings.SERVER_TIMING:
+            response["Server-Timing"] = stats.server_timing()
+        return response
+
+
+def metrics_view(request):
+    """
+    Метрики в текстовом формате Prometheus: по токену METRICS_TOKEN
+    в заголовке Authorization или администратору, вошедшему через
+    админку. Без токена в настройках доступны только администратору.
+    """
+    token = settings.METRICS_TOKEN
+    authorized = token and hmac.compare_digest(
+        request.META.get("HTTP_AUTHORIZATION", ""), f"Bearer {token}"
+    )
+    if not (authorized or request.user.is_staff):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
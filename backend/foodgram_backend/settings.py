@@ -26,6 +26,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "foodgram_backend.metrics.RequestMetricsMiddleware",
+    "foodgram_backend.db.DatabaseRoutingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -35,7 +37,7 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
-ROOT_URLCONF = "foodgram_backend.urls"
+ROOT_URLCONF = os.getenv("ROOT_URLCONF", "foodgram_backend.urls")
 
 TEMPLATES = [
     {
@@ -56,16 +58,74 @@ TEMPLATES = [
 WSGI_APPLICATION = "foodgram_backend.wsgi.application"
 
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.postgresql",
-        "NAME": os.getenv("POSTGRES_DB", "django"),
-        "USER": os.getenv("POSTGRES_USER", "django"),
-        "PASSWORD": os.getenv("POSTGRES_PASSWORD", ""),
-        "HOST": os.getenv("DB_HOST", ""),
-        "PORT": os.getenv("DB_PORT", 5432)
+if os.getenv("DB_ENGINE") == "sqlite":
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": BASE_DIR / "db.sqlite3",
+        }
     }
-}
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.getenv("POSTGRES_DB", "django"),
+            "USER": os.getenv("POSTGRES_USER", "django"),
+            "PASSWORD": os.getenv("POSTGRES_PASSWORD", ""),
+            "HOST": os.getenv("DB_HOST", ""),
+            "PORT": os.getenv("DB_PORT", 5432),
+            "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", 60)),
+            "OPTIONS": {
+                "connect_timeout": int(os.getenv("DB_CONNECT_TIMEOUT", 5)),
+                "keepalives": 1,
+                "keepalives_idle": int(os.getenv("DB_KEEPALIVES_IDLE", 30)),
+            },
+        }
+    }
+
+for number, replica in enumerate(
+    filter(None, os.getenv("DB_REPLICA_HOSTS", "").split(",")), start=1
+):
+    host, _, port = replica.strip().partition(":")
+    DATABASES[f"replica_{number}"] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "PORT": port or DATABASES["default"]["PORT"],
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = (
+    ["foodgram_backend.db.PrimaryReplicaRouter"] if DATABASE_REPLICAS else []
+)
+DB_HEALTH_CHECKS = os.getenv("DB_HEALTH_CHECKS", "True").lower() == "true"
+DB_REPLICA_PIN_COOKIE = "db_primary"
+DB_REPLICA_PIN_SECONDS = int(os.getenv("DB_REPLICA_PIN_SECONDS", 5))
+
+REDIS_URL = os.getenv("REDIS_URL", "")
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django_redis.cache.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "foodgram",
+            "OPTIONS": {"MAX_ENTRIES": int(os.getenv("CACHE_MAX_ENTRIES", 1000))},
+        }
+    }
+
+# Кэш ответов сбрасывается версиями, которые хранятся в самом кэше.
+# LocMemCache у каждого воркера свой, и сброс из одного процесса (или
+# из management-команды) не дошёл бы до остальных, поэтому без общего
+# кэша (Redis) кэширование ответов выключено.
+RESPONSE_CACHE = bool(REDIS_URL) and (
+    os.getenv("RESPONSE_CACHE", "True").lower() == "true"
+)
 
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -101,6 +161,10 @@ STATIC_ROOT = BASE_DIR / "collected_static"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = "/app/media"
 
+IMAGE_PROCESS_WORKERS = int(os.getenv("IMAGE_PROCESS_WORKERS", 2))
+
+ASYNC_DB_WORKERS = int(os.getenv("ASYNC_DB_WORKERS", 8))
+
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
@@ -111,6 +175,10 @@ REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "rest_framework.authentication.TokenAuthentication",
     ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "foodgram_backend.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
     "DEFAULT_PAGINATION_CLASS": "recipe.paginations.CustomPagination",
     "PAGE_SIZE": 6,
 }
@@ -124,3 +192,21 @@ DJOSER = {
     "LOGIN_FIELD": "email",
 }
 BASE_URL = "https://foodgrambestrecipe.ddns.net"
+
+INGREDIENT_PREFIX_INDEX = (
+    os.getenv("INGREDIENT_PREFIX_INDEX", "False").lower() == "true"
+)
+CATALOG_POLL_SECONDS = float(os.getenv("CATALOG_POLL_SECONDS", 5))
+FAST_SERIALIZERS = os.getenv("FAST_SERIALIZERS", "True").lower() == "true"
+# Версии зависимостей карточек рецептов тоже хранятся в кэше и по той
+# же причине требуют Redis.
+RECIPE_DETAIL_CACHE = bool(REDIS_URL) and (
+    os.getenv("RECIPE_DETAIL_CACHE", "True").lower() == "true"
+)
+
+REQUEST_METRICS = os.getenv("REQUEST_METRICS", "True").lower() == "true"
+SERVER_TIMING = os.getenv("SERVER_TIMING", "True").lower() == "true"
+SERIALIZER_METRICS = (
+    os.getenv("SERIALIZER_METRICS", "False").lower() == "true"
+)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
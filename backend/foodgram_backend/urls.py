@@ -4,10 +4,13 @@ from django.contrib import admin
 from django.urls import include, path
 from rest_framework import routers
 
+from .metrics import metrics_view
+
 router = routers.DefaultRouter()
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("api/metrics/", metrics_view, name="metrics"),
     path("api/", include("recipe.urls")),
     path("api/", include("djoser.urls")),
     path("api/auth/", include("djoser.urls.authtoken")),
@@ -1,7 +1,6 @@
 from django.contrib import admin
 
 from foodgram_backend.constants import VALIDATOR_COUNT
-from shopping.models import Favorite
 
 from .models import Ingredient, Recipe, RecipeIngredient, Tag
 
@@ -26,11 +25,6 @@ class RecipeAdmin(admin.ModelAdmin):
     readonly_fields = ("favorites_count",)
     inlines = [RecipeIngredientInline]
 
-    @admin.display(description="Число добавлений в избранное")
-    def favorites_count(self, obj):
-        """Возвращает общее число добавлений рецепта в избранное."""
-        return Favorite.objects.filter(recipe=obj).count()
-
 
 @admin.register(Ingredient)
 class IngregientAdmin(admin.ModelAdmin):
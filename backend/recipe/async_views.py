@@ -0,0 +1,77 @@
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from foodgram_backend.db import check_connections
+
+from .views import IngredientViewSet, RecipeViewSet, TagViewSet
+
+READ_METHODS = ("GET", "HEAD")
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.ASYNC_DB_WORKERS, thread_name_prefix="async-db"
+)
+
+
+def run_view(view, request, args, kwargs):
+    """
+    Выполняет представление в потоке пула. У каждого потока своё
+    соединение с базой, так что пул ограничивает и число соединений.
+    """
+    close_old_connections()
+    if settings.DB_HEALTH_CHECKS:
+        check_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, "render") and not response.is_rendered:
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def async_read_view(viewset, actions):
+    """
+    Асинхронное представление поверх обычного viewset. Чтение
+    выполняется в пуле потоков async-db параллельно, а не в
+    единственном потоке, которым Django под ASGI обслуживает
+    синхронные представления; ответ совпадает с обычным. Остальные
+    методы передаются viewset как есть.
+    """
+    view = viewset.as_view(actions)
+    write_view = sync_to_async(view)
+
+    @wraps(view)
+    async def async_view(request, *args, **kwargs):
+        if request.method not in READ_METHODS:
+            return await write_view(request, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(
+            executor,
+            contextvars.copy_context().run,
+            run_view, view, request, args, kwargs,
+        )
+
+    return async_view
+
+
+tag_list = async_read_view(TagViewSet, {"get": "list"})
+tag_detail = async_read_view(TagViewSet, {"get": "retrieve"})
+ingredient_list = async_read_view(IngredientViewSet, {"get": "list"})
+ingredient_detail = async_read_view(IngredientViewSet, {"get": "retrieve"})
+recipe_list = async_read_view(
+    RecipeViewSet, {"get": "list", "post": "create"}
+)
+recipe_detail = async_read_view(
+    RecipeViewSet,
+    {
+        "get": "retrieve",
+        "put": "update",
+        "patch": "partial_update",
+        "delete": "destroy",
+    },
+)
@@ -0,0 +1,124 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from foodgram_backend.constants import RESPONSE_CACHE_TIMEOUT
+
+TAGS = "tags"
+INGREDIENTS = "ingredients"
+RECIPES = "recipes"
+
+
+def _version_key(namespace):
+    return f"foodgram:version:{namespace}"
+
+
+def get_version(namespace):
+    """
+    Версия пространства имён кэша — время последнего изменения данных.
+
+    Если версии ещё нет (или она вытеснена), точкой отсчёта становится
+    текущее время, что равносильно сбросу кэша.
+    """
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        version = time.time()
+        cache.add(_version_key(namespace), version, timeout=None)
+    return version
+
+
+def get_versions(namespaces, timeout=None):
+    """Версии нескольких пространств имён за одно обращение к кэшу."""
+    keys = {_version_key(namespace): namespace for namespace in namespaces}
+    versions = {
+        keys[key]: version for key, version in cache.get_many(keys).items()
+    }
+    missing = [key for key, namespace in keys.items()
+               if namespace not in versions]
+    if missing:
+        now = time.time()
+        for key in missing:
+            cache.add(key, now, timeout=timeout)
+        versions.update(
+            (keys[key], version)
+            for key, version in cache.get_many(missing).items()
+        )
+    return versions
+
+
+def bump_version(*namespaces, timeout=None):
+    """Инвалидирует все ответы в переданных пространствах имён."""
+    now = time.time()
+    for namespace in namespaces:
+        previous = cache.get(_version_key(namespace)) or 0
+        cache.set(
+            _version_key(namespace),
+            max(now, previous + 0.001),
+            timeout=timeout,
+        )
+
+
+def bump_on_commit(*namespaces, timeout=None):
+    """
+    bump_version после коммита текущей транзакции. Если сменить
+    версию раньше, параллельный запрос успеет закэшировать ещё не
+    изменённые данные уже под новой версией.
+    """
+    transaction.on_commit(
+        lambda: bump_version(*namespaces, timeout=timeout)
+    )
+
+
+def cached_response(anonymous_only=False):
+    """
+    Кэширует data ответа GET-метода вьюсета с ключом по версии
+    пространства имён cache_namespace вьюсета и полному пути запроса,
+    выставляет ETag и Last-Modified и отвечает 304 на условные запросы.
+    Работает только при RESPONSE_CACHE (нужен общий для воркеров кэш).
+    """
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            if not settings.RESPONSE_CACHE or (
+                anonymous_only and request.user.is_authenticated
+            ):
+                return method(self, request, *args, **kwargs)
+
+            namespace = self.cache_namespace
+            version = get_version(namespace)
+            digest = hashlib.md5(
+                f"{version}:{request.get_full_path()}".encode()
+            ).hexdigest()
+            etag = quote_etag(digest)
+            last_modified = int(version)
+
+            response = get_conditional_response(
+                request._request, etag=etag, last_modified=last_modified
+            )
+            if response is None:
+                key = f"foodgram:{namespace}:{digest}"
+                data = cache.get(key)
+                if data is None:
+                    response = method(self, request, *args, **kwargs)
+                    if response.status_code != 200:
+                        return response
+                    cache.set(key, response.data, RESPONSE_CACHE_TIMEOUT)
+                else:
+                    response = Response(data)
+
+            response["ETag"] = etag
+            response["Last-Modified"] = http_date(last_modified)
+            patch_vary_headers(response, ["Authorization"])
+            return response
+
+        return wrapper
+
+    return decorator
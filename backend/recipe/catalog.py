@@ -0,0 +1,183 @@
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+
+from .models import CatalogVersion, Ingredient, Tag
+
+logger = logging.getLogger(__name__)
+
+CATALOG_VERSION_ID = 1
+
+
+class IngredientRecord:
+    __slots__ = ("id", "name", "measurement_unit")
+
+    def __init__(self, id, name, measurement_unit):
+        self.id = id
+        self.name = name
+        self.measurement_unit = measurement_unit
+
+
+class TagRecord:
+    __slots__ = ("id", "name", "slug")
+
+    def __init__(self, id, name, slug):
+        self.id = id
+        self.name = name
+        self.slug = slug
+
+
+class Snapshot:
+    """Неизменяемый срез справочника; заменяется целиком при загрузке."""
+
+    __slots__ = ("version", "ingredients", "tags")
+
+    def __init__(self, version, ingredients, tags):
+        self.version = version
+        self.ingredients = ingredients
+        self.tags = tags
+
+
+def current_version():
+    return CatalogVersion.objects.filter(pk=CATALOG_VERSION_ID).values_list(
+        "version", flat=True
+    ).first() or 0
+
+
+def bump():
+    """Увеличивает версию справочника в базе."""
+    if not CatalogVersion.objects.filter(pk=CATALOG_VERSION_ID).update(
+        version=F("version") + 1
+    ):
+        CatalogVersion.objects.get_or_create(
+            pk=CATALOG_VERSION_ID, defaults={"version": 1}
+        )
+
+
+class Catalog:
+    """
+    Ингредиенты и теги в памяти процесса: сериализаторы и валидаторы
+    рецептов берут названия и проверяют id без запросов к базе.
+
+    Справочник загружается при первом обращении в каждом процессе.
+    Фоновый поток раз в CATALOG_POLL_SECONDS сверяет версию в
+    CatalogVersion и перезагружает справочник, если его изменил другой
+    воркер; изменения в своём процессе применяются сразу после коммита.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._pid = None
+        self._poller_pid = None
+
+    def _load(self):
+        # Версия читается первой: изменение во время загрузки приведёт
+        # к повторной загрузке, а не к пропуску.
+        version = current_version()
+        ingredients = {
+            pk: IngredientRecord(pk, name, unit)
+            for pk, name, unit in Ingredient.objects.values_list(
+                "id", "name", "measurement_unit"
+            )
+        }
+        tags = {
+            pk: TagRecord(pk, name, slug)
+            for pk, name, slug in Tag.objects.values_list("id", "name", "slug")
+        }
+        self._snapshot = Snapshot(version, ingredients, tags)
+        return self._snapshot
+
+    def _get(self):
+        snapshot, pid = self._snapshot, os.getpid()
+        if snapshot is not None and self._pid == pid:
+            return snapshot
+        with self._lock:
+            if self._snapshot is None or self._pid != pid:
+                self._load()
+                self._pid = pid
+            if self._poller_pid != pid and settings.CATALOG_POLL_SECONDS > 0:
+                self._poller_pid = pid
+                threading.Thread(
+                    target=self._poll, name="catalog-poller", daemon=True
+                ).start()
+            return self._snapshot
+
+    def _poll(self):
+        while True:
+            time.sleep(settings.CATALOG_POLL_SECONDS)
+            try:
+                close_old_connections()
+                self.refresh()
+            except Exception:
+                logger.exception("Не удалось обновить справочник.")
+
+    def refresh(self):
+        """Перезагружает справочник, если версия в базе изменилась."""
+        snapshot = self._snapshot
+        if snapshot is not None and current_version() != snapshot.version:
+            self.reload()
+
+    def reload(self):
+        with self._lock:
+            self._pid = os.getpid()
+            return self._load()
+
+    def invalidate(self):
+        """Следующее обращение загрузит справочник заново."""
+        self._snapshot = None
+
+    def changed(self):
+        """
+        Отмечает изменение ингредиентов или тегов: другие воркеры увидят
+        новую версию, этот процесс перезагрузит справочник после коммита.
+        """
+        bump()
+        transaction.on_commit(self.invalidate)
+
+    def snapshot(self):
+        """Текущий срез справочника; при перезагрузке заменяется новым."""
+        return self._get()
+
+    def ingredient(self, ingredient_id):
+        record = self._get().ingredients.get(ingredient_id)
+        if record is None:
+            # Ингредиент из строки рецепта есть в базе, но ещё не дошёл
+            # до справочника этого воркера.
+            record = self.reload().ingredients[ingredient_id]
+        return record
+
+    def tag(self, tag_id):
+        record = self._get().tags.get(tag_id)
+        if record is None:
+            record = self.reload().tags[tag_id]
+        return record
+
+    def missing(self, model, ids):
+        """
+        Id из ids, которых нет среди объектов model. Промахи
+        перепроверяются по базе: справочник мог ещё не обновиться.
+        """
+        snapshot = self._get()
+        records = (
+            snapshot.ingredients if model is Ingredient else snapshot.tags
+        )
+        missing = {pk for pk in ids if pk not in records}
+        if missing:
+            found = set(
+                model.objects.filter(id__in=missing).values_list(
+                    "id", flat=True
+                )
+            )
+            if found:
+                self.invalidate()
+            missing -= found
+        return missing
+
+
+catalog = Catalog()
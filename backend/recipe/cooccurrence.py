@@ -0,0 +1,194 @@
+from array import array
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Max
+from scipy import sparse
+
+from foodgram_backend.constants import (IMPORT_BATCH_SIZE,
+                                        SIMILAR_RECIPES_BLOCK_ENTRIES,
+                                        SIMILAR_RECIPES_BLOCK_SIZE,
+                                        SIMILAR_RECIPES_MIN_COMMON,
+                                        SIMILAR_RECIPES_TOP_K)
+from shopping.aggregates import batches
+from shopping.models import Favorite
+
+from .models import RecommendationChange, SimilarRecipe
+
+
+class CooccurrenceModel:
+    """
+    Разреженная матрица «рецепт × пользователь» по избранному.
+    Строка произведения matrix[i] @ matrix.T — число пользователей,
+    добавивших в избранное и рецепт i, и каждый другой рецепт;
+    близость — косинусная: common / sqrt(n_i * n_j).
+    """
+
+    def __init__(self, recipe_ids, user_positions, recipe_positions):
+        self.recipe_ids = recipe_ids
+        users = int(user_positions.max()) + 1 if len(user_positions) else 0
+        self.matrix = sparse.csr_matrix(
+            (
+                np.ones(len(recipe_positions), dtype=np.float32),
+                (recipe_positions, user_positions),
+            ),
+            shape=(len(recipe_ids), users),
+        )
+        self.transposed = self.matrix.T.tocsr()
+        counts = np.diff(self.matrix.indptr)
+        self.norms = np.sqrt(counts)
+        # Оценка сверху числа ненулевых элементов строки произведения:
+        # сумма числа избранного у всех пользователей рецепта.
+        self.work = np.minimum(
+            self.matrix @ np.diff(self.transposed.indptr), len(recipe_ids)
+        )
+
+    @classmethod
+    def from_favorites(cls):
+        users, recipes = array("q"), array("q")
+        for user_id, recipe_id in Favorite.objects.values_list(
+            "user_id", "recipe_id"
+        ).iterator(chunk_size=IMPORT_BATCH_SIZE):
+            users.append(user_id)
+            recipes.append(recipe_id)
+        _, user_positions = np.unique(
+            np.frombuffer(users, dtype=np.int64), return_inverse=True
+        )
+        recipe_ids, recipe_positions = np.unique(
+            np.frombuffer(recipes, dtype=np.int64), return_inverse=True
+        )
+        return cls(recipe_ids, user_positions, recipe_positions)
+
+    def positions(self, recipe_ids):
+        """Номера строк рецептов; -1 для рецептов без избранного."""
+        recipe_ids = np.asarray(recipe_ids, dtype=np.int64)
+        positions = np.searchsorted(self.recipe_ids, recipe_ids)
+        positions[positions == len(self.recipe_ids)] = 0
+        found = (
+            self.recipe_ids[positions] == recipe_ids
+            if len(self.recipe_ids) else np.zeros(len(recipe_ids), bool)
+        )
+        return np.where(found, positions, -1)
+
+    def blocks(self, recipe_ids):
+        """
+        Делит рецепты на блоки не больше SIMILAR_RECIPES_BLOCK_SIZE
+        строк и примерно SIMILAR_RECIPES_BLOCK_ENTRIES элементов
+        произведения, чтобы популярные рецепты не занимали всю память.
+        """
+        block, entries = [], 0
+        for recipe_id, position in zip(
+            recipe_ids, self.positions(recipe_ids).tolist()
+        ):
+            work = int(self.work[position]) if position >= 0 else 0
+            if block and (
+                len(block) >= SIMILAR_RECIPES_BLOCK_SIZE
+                or entries + work > SIMILAR_RECIPES_BLOCK_ENTRIES
+            ):
+                yield block
+                block, entries = [], 0
+            block.append((recipe_id, position))
+            entries += work
+        if block:
+            yield block
+
+    def common(self, positions):
+        """Число общих пользователей для строк positions."""
+        return (self.matrix[positions] @ self.transposed).tocsr()
+
+    def neighbors(self, recipe_ids):
+        """Рецепты, у которых есть общие с recipe_ids пользователи."""
+        neighbors = set()
+        for block in self.blocks(recipe_ids):
+            positions = [position for _, position in block if position >= 0]
+            if positions:
+                common = self.common(positions)
+                neighbors.update(
+                    self.recipe_ids[
+                        common.indices[
+                            common.data >= SIMILAR_RECIPES_MIN_COMMON
+                        ]
+                    ].tolist()
+                )
+        return neighbors
+
+    def top_similar(self, block):
+        """Строки SimilarRecipe для блока из blocks()."""
+        positions = [position for _, position in block if position >= 0]
+        if not positions:
+            return []
+        common = self.common(positions)
+        rows = []
+        for row, position in enumerate(positions):
+            start, end = common.indptr[row], common.indptr[row + 1]
+            columns, counts = common.indices[start:end], common.data[start:end]
+            keep = (counts >= SIMILAR_RECIPES_MIN_COMMON) & (
+                columns != position
+            )
+            columns = columns[keep]
+            scores = counts[keep] / (
+                self.norms[position] * self.norms[columns]
+            )
+            if len(scores) > SIMILAR_RECIPES_TOP_K:
+                best = np.argpartition(
+                    -scores, SIMILAR_RECIPES_TOP_K - 1
+                )[:SIMILAR_RECIPES_TOP_K]
+                columns, scores = columns[best], scores[best]
+            recipe_id = int(self.recipe_ids[position])
+            rows.extend(
+                SimilarRecipe(
+                    recipe_id=recipe_id, similar_id=similar_id, score=score
+                )
+                for similar_id, score in zip(
+                    self.recipe_ids[columns].tolist(), scores.tolist()
+                )
+            )
+        return rows
+
+
+def save_block(model, block):
+    """Заменяет похожие рецепты блока одним DELETE и одним INSERT."""
+    rows = model.top_similar(block)
+    with transaction.atomic():
+        SimilarRecipe.objects.filter(
+            recipe_id__in=[recipe_id for recipe_id, _ in block]
+        ).delete()
+        SimilarRecipe.objects.bulk_create(rows, batch_size=IMPORT_BATCH_SIZE)
+
+
+def build_similar_recipes(full=False):
+    """
+    Пересчитывает таблицу похожих рецептов. По умолчанию только для
+    рецептов из RecommendationChange, их соседей по избранному и
+    рецептов, у которых они были в списке похожих; с full=True — для
+    всех. Возвращает число пересчитанных рецептов.
+    """
+    last = RecommendationChange.objects.aggregate(last=Max("id"))["last"]
+    if not full and last is None:
+        return 0
+    model = CooccurrenceModel.from_favorites()
+    if full:
+        recipe_ids = set(model.recipe_ids.tolist())
+        recipe_ids.update(
+            SimilarRecipe.objects.values_list(
+                "recipe_id", flat=True
+            ).distinct()
+        )
+    else:
+        changed = set(
+            RecommendationChange.objects.filter(id__lte=last).values_list(
+                "recipe_id", flat=True
+            )
+        )
+        recipe_ids = changed | model.neighbors(sorted(changed))
+        for recipe_batch in batches(changed):
+            recipe_ids.update(
+                SimilarRecipe.objects.filter(
+                    similar_id__in=recipe_batch
+                ).values_list("recipe_id", flat=True)
+            )
+    for block in model.blocks(sorted(recipe_ids)):
+        save_block(model, block)
+    if last is not None:
+        RecommendationChange.objects.filter(id__lte=last).delete()
+    return len(recipe_ids)
@@ -0,0 +1,50 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_subquery(model, field, outer_field):
+    """Число строк model, у которых field равен outer_field внешней строки."""
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef(outer_field)})
+            .order_by()
+            .values(field)
+            .annotate(total=Count("pk"))
+            .values("total")
+        ),
+        0,
+    )
+
+
+def repair_counter(queryset, field, actual):
+    """
+    Пересчитывает счётчик field у строк, где он разошёлся с actual,
+    и возвращает число исправленных строк.
+    """
+    drifted = queryset.annotate(actual=actual).exclude(
+        **{field: F("actual")}
+    )
+    return queryset.filter(pk__in=drifted.values("pk")).update(
+        **{field: actual}
+    )
+
+
+def recount_favorites(recipe_model, favorite_model):
+    return repair_counter(
+        recipe_model.objects.all(),
+        "favorites_count",
+        count_subquery(favorite_model, "recipe", "pk"),
+    )
+
+
+def recount_profiles(profile_model, recipe_model, subscription_model):
+    profiles = profile_model.objects.all()
+    return repair_counter(
+        profiles,
+        "recipes_count",
+        count_subquery(recipe_model, "author", "user_id"),
+    ) + repair_counter(
+        profiles,
+        "followers_count",
+        count_subquery(subscription_model, "author", "user_id"),
+    )
@@ -0,0 +1,136 @@
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
+
+from foodgram_backend.constants import RECIPE_DETAIL_CACHE_TIMEOUT
+from shopping.models import Favorite, ShoppingCart
+from users.models import Subscription
+
+from .cache import bump_on_commit, get_versions
+from .models import Recipe
+
+# Сбрасывает все карточки сразу: массовые загрузки без сигналов.
+ALL_DETAILS = "recipe-details"
+# Версии отдельных объектов живут дольше карточек: вытесненная версия
+# создаётся заново и лишь делает зависящие от неё карточки устаревшими.
+VERSION_TIMEOUT = 2 * RECIPE_DETAIL_CACHE_TIMEOUT
+
+
+def recipe_dependency(recipe_id):
+    return f"recipe:{recipe_id}"
+
+
+def author_dependency(user_id):
+    return f"author:{user_id}"
+
+
+def ingredient_dependency(ingredient_id):
+    return f"ingredient:{ingredient_id}"
+
+
+def tag_dependency(tag_id):
+    return f"tag:{tag_id}"
+
+
+def dependencies(payload):
+    """Пространства имён, от которых зависит карточка рецепта."""
+    return [
+        ALL_DETAILS,
+        recipe_dependency(payload["id"]),
+        author_dependency(payload["author"]["id"]),
+        *(ingredient_dependency(item["id"])
+          for item in payload["ingredients"]),
+        *(tag_dependency(tag["id"]) for tag in payload["tags"]),
+    ]
+
+
+def invalidate(*namespaces):
+    """
+    Делает устаревшими карточки, зависящие от namespaces. Версии
+    меняются после коммита, чтобы карточку, собранную по ещё не
+    зафиксированным данным, нельзя было сохранить с новой версией.
+    """
+    bump_on_commit(*namespaces, timeout=VERSION_TIMEOUT)
+
+
+def _key(recipe_id, base_url):
+    # Ссылки на изображения абсолютные, поэтому карточка своя для
+    # каждого адреса сайта.
+    digest = hashlib.md5(base_url.encode()).hexdigest()
+    return f"foodgram:recipe-detail:{recipe_id}:{digest}"
+
+
+def _thumbnails_ready(payload):
+    """Миниатюры создаются после коммита; до этого в них оригиналы."""
+    author = payload["author"]
+    return not (
+        payload["image"] and payload["image_thumb"] == payload["image"]
+        or author["avatar"] and author["avatar_thumb"] == author["avatar"]
+    )
+
+
+def cached_payload(recipe_id, base_url, build):
+    """
+    Карточка рецепта без данных текущего пользователя: флаги False,
+    как для анонима. build() собирает её по базе и возвращает None,
+    если рецепта нет.
+
+    Вместе с карточкой хранятся версии её зависимостей (рецепт, автор,
+    ингредиенты, теги); карточка действительна, пока все они совпадают
+    с текущими. Версии читаются до обращения к базе: изменение во
+    время сборки оставит сохранённую карточку устаревшей.
+    """
+    key = _key(recipe_id, base_url)
+    entry = cache.get(key)
+    known = entry[0].keys() if entry else [recipe_dependency(recipe_id)]
+    versions = get_versions(known, timeout=VERSION_TIMEOUT)
+    if entry and entry[0] == versions:
+        return entry[1]
+
+    payload = build()
+    if payload is None:
+        return None
+    if _thumbnails_ready(payload):
+        namespaces = dependencies(payload)
+        versions.update(
+            get_versions(
+                [name for name in namespaces if name not in versions],
+                timeout=VERSION_TIMEOUT,
+            )
+        )
+        cache.set(
+            key,
+            ({name: versions[name] for name in namespaces}, payload),
+            RECIPE_DETAIL_CACHE_TIMEOUT,
+        )
+    return payload
+
+
+def with_user_flags(payload, user):
+    """
+    Карточка с флагами избранного, списка покупок и подписки на автора
+    для user, посчитанными одним запросом. None, если рецепт удалён.
+    """
+    flags = Recipe.objects.filter(pk=payload["id"]).values(
+        is_favorited=Exists(
+            Favorite.objects.filter(user=user, recipe=OuterRef("pk"))
+        ),
+        is_in_shopping_cart=Exists(
+            ShoppingCart.objects.filter(user=user, recipe=OuterRef("pk"))
+        ),
+        is_subscribed=Exists(
+            Subscription.objects.filter(
+                user=user, author=OuterRef("author_id")
+            )
+        ),
+    ).first()
+    if flags is None:
+        return None
+    data = dict(payload)
+    data["author"] = dict(
+        payload["author"], is_subscribed=flags["is_subscribed"]
+    )
+    data["is_favorited"] = flags["is_favorited"]
+    data["is_in_shopping_cart"] = flags["is_in_shopping_cart"]
+    return data
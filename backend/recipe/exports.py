@@ -0,0 +1,98 @@
+import csv
+import json
+
+from foodgram_backend.constants import EXPORT_CHUNK_SIZE
+from shopping.models import ShoppingListItem
+
+
+def shopping_list(user):
+    """Итоговое количество каждого ингредиента из списка покупок."""
+    return (
+        ShoppingListItem.objects.filter(user=user)
+        .values(
+            "ingredient__name", "ingredient__measurement_unit",
+            "total_amount",
+        )
+        .order_by("ingredient__name", "ingredient__measurement_unit")
+    )
+
+
+def shopping_list_rows(user):
+    """
+    Строки списка покупок через серверный курсор, поэтому память
+    на запрос не зависит от размера списка.
+    """
+    return shopping_list(user).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+class Echo:
+    """Буфер для csv.writer, возвращающий строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+class TextExport:
+    """Список покупок в виде текста."""
+
+    content_type = "text/plain; charset=utf-8"
+    extension = "txt"
+
+    def render(self, rows):
+        yield "Список покупок:\n"
+        for item in rows:
+            yield (
+                f"- {item['ingredient__name']}: "
+                f"{item['total_amount']} "
+                f"{item['ingredient__measurement_unit']}\n"
+            )
+
+
+class CSVExport:
+    """Список покупок в формате CSV."""
+
+    content_type = "text/csv; charset=utf-8"
+    extension = "csv"
+
+    def render(self, rows):
+        writer = csv.writer(Echo())
+        yield writer.writerow(["name", "amount", "measurement_unit"])
+        for item in rows:
+            yield writer.writerow(
+                [
+                    item["ingredient__name"],
+                    item["total_amount"],
+                    item["ingredient__measurement_unit"],
+                ]
+            )
+
+
+class JSONExport:
+    """Список покупок в формате JSON."""
+
+    content_type = "application/json"
+    extension = "json"
+
+    def render(self, rows):
+        yield "["
+        separator = ""
+        for item in rows:
+            yield separator + json.dumps(
+                {
+                    "name": item["ingredient__name"],
+                    "amount": item["total_amount"],
+                    "measurement_unit": item["ingredient__measurement_unit"],
+                },
+                ensure_ascii=False,
+            )
+            separator = ","
+        yield "]"
+
+
+# PDF не поддерживается: для кириллицы нужен встроенный шрифт и
+# отдельная библиотека вёрстки, которых в проекте нет.
+SHOPPING_LIST_EXPORTS = {
+    "txt": TextExport(),
+    "csv": CSVExport(),
+    "json": JSONExport(),
+}
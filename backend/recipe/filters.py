@@ -1,6 +1,48 @@
+from django.contrib.postgres.search import (SearchHeadline, SearchQuery,
+                                            SearchRank)
+from django.db import connection
+from django.db.models import (Case, Exists, F, IntegerField, OuterRef, Value,
+                              When)
 from django_filters import rest_framework as filters
 
-from .models import Recipe, Tag
+from foodgram_backend.constants import INGREDIENT_SEARCH_LIMIT
+from shopping.models import Favorite, ShoppingCart
+
+from .models import Ingredient, Recipe, Tag
+from .search import SEARCH_CONFIG, search_index
+
+
+class IngredientFilter(filters.FilterSet):
+    """
+    Поиск ингредиентов по названию: сначала совпадения по началу
+    строки, затем по вхождению подстроки.
+    """
+
+    name = filters.CharFilter(method="filter_name")
+
+    class Meta:
+        model = Ingredient
+        fields = ["name"]
+
+    def filter_name(self, queryset, name, value):
+        """
+        Ранжированная и ограниченная выдача для автодополнения.
+        Совпадения по началу названия ищутся по индексу
+        UPPER(name) text_pattern_ops; поиск по подстроке выполняется,
+        только если их меньше INGREDIENT_SEARCH_LIMIT.
+        """
+        prefix = queryset.filter(name__istartswith=value).order_by("name")
+        if len(
+            prefix.values_list("pk", flat=True)[:INGREDIENT_SEARCH_LIMIT]
+        ) == INGREDIENT_SEARCH_LIMIT:
+            return prefix[:INGREDIENT_SEARCH_LIMIT]
+        return queryset.filter(name__icontains=value).annotate(
+            rank=Case(
+                When(name__istartswith=value, then=Value(0)),
+                default=Value(1),
+                output_field=IntegerField(),
+            )
+        ).order_by("rank", "name")[:INGREDIENT_SEARCH_LIMIT]
 
 
 class RecipeFilter(filters.FilterSet):
@@ -18,24 +60,64 @@ class RecipeFilter(filters.FilterSet):
         method="filter_in_shopping_cart"
     )
     is_favorited = filters.BooleanFilter(method="filter_favorited")
+    search = filters.CharFilter(method="filter_search")
 
     class Meta:
         model = Recipe
-        fields = ["author", "tags", "is_in_shopping_cart", "is_favorited"]
+        fields = [
+            "author", "tags", "is_in_shopping_cart", "is_favorited", "search"
+        ]
+
+    def filter_search(self, queryset, name, value):
+        """
+        Полнотекстовый поиск по названию, описанию и ингредиентам
+        с сортировкой по релевантности.
+        """
+        if connection.vendor != "postgresql":
+            ranked = search_index.search(value)
+            return queryset.filter(
+                pk__in=[pk for pk, _ in ranked]
+            ).order_by(
+                Case(
+                    *(
+                        When(pk=pk, then=Value(position))
+                        for position, (pk, _) in enumerate(ranked)
+                    ),
+                    default=Value(len(ranked)),
+                    output_field=IntegerField(),
+                ),
+            )
+        query = SearchQuery(
+            value, config=SEARCH_CONFIG, search_type="websearch"
+        )
+        return queryset.filter(search_vector=query).annotate(
+            rank=SearchRank(F("search_vector"), query),
+            search_headline=SearchHeadline(
+                "text", query, config=SEARCH_CONFIG
+            ),
+        ).order_by("-rank", "-id")
+
+    def filter_user_relation(self, queryset, model, value):
+        """
+        Оставляет рецепты, связанные (value=True) или не связанные
+        (value=False) с текущим пользователем через model.
+        """
+        user = self.request.user
+        if not user.is_authenticated:
+            return queryset.none() if value else queryset
+        related = Exists(
+            model.objects.filter(user=user, recipe=OuterRef("pk"))
+        )
+        return queryset.filter(related if value else ~related)
 
     def filter_in_shopping_cart(self, queryset, name, value):
         """
         Фильтрует рецепты, которые находятся в списке покупок пользователя.
         """
-        user = self.request.user
-        if value and user.is_authenticated:
-            return queryset.filter(shoppingcart__user=user).distinct()
-        return queryset
+        return self.filter_user_relation(queryset, ShoppingCart, value)
 
     def filter_favorited(self, queryset, name, value):
         """
-        Фильтрует рецепты, которые находятся в избранном.
+        Фильтрует рецепты, которые находятся в избранном пользователя.
         """
-        if value:
-            return queryset.filter(favorite__isnull=False).distinct()
-        return queryset
+        return self.filter_user_relation(queryset, Favorite, value)
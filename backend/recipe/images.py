@@ -0,0 +1,193 @@
+import base64
+import binascii
+import logging
+import os
+import tempfile
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.dispatch import Signal
+from drf_extra_fields.fields import Base64ImageField as BaseBase64ImageField
+from PIL import Image, features
+from rest_framework import serializers
+
+from foodgram_backend.constants import BASE64_CHUNK_SIZE, THUMBNAIL_SIZE
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = {"JPEG": "jpg", "PNG": "png", "GIF": "gif", "WEBP": "webp"}
+THUMBNAIL_FORMAT = "WEBP" if features.check("webp") else "JPEG"
+
+# Миниатюра создана и отмечена в модели; аргумент instance.
+thumbnail_created = Signal()
+
+_executor = None
+
+
+def get_executor():
+    """Пул процессов для работы с Pillow; None — выполнять в потоке."""
+    global _executor
+    if _executor is None and settings.IMAGE_PROCESS_WORKERS:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.IMAGE_PROCESS_WORKERS
+        )
+    return _executor
+
+
+def inspect_image(path):
+    """Проверяет изображение и возвращает его формат."""
+    with Image.open(path) as image:
+        image.verify()
+        return image.format
+
+
+def make_thumbnail(source, target, size):
+    """Сохраняет уменьшенную копию source в target."""
+    with Image.open(source) as image:
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA")
+        if THUMBNAIL_FORMAT == "JPEG":
+            image = image.convert("RGB")
+        image.thumbnail((size, size))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        image.save(target, THUMBNAIL_FORMAT, quality=80)
+
+
+def thumbnail_name(name, size=THUMBNAIL_SIZE):
+    """Путь миниатюры в хранилище для исходного файла name."""
+    root = os.path.splitext(name)[0]
+    return f"thumbs/{root}_{size}.{THUMBNAIL_FORMAT.lower()}"
+
+
+def _thumbnail_done(mark_ready, future):
+    if future.exception() is not None:
+        logger.error(
+            "Не удалось создать миниатюру", exc_info=future.exception()
+        )
+        return
+    # Обработчик выполняется в служебном потоке пула со своим
+    # соединением с базой.
+    close_old_connections()
+    mark_ready()
+
+
+def thumbnail_ready(name, thumbnail):
+    """
+    Готова ли миниатюра файла name: после создания её имя записывается
+    в поле модели, а старое имя после смены файла перестаёт совпадать.
+    """
+    return bool(name) and thumbnail == thumbnail_name(name)
+
+
+def schedule_thumbnail(instance, image_field, thumbnail_field):
+    """
+    После коммита транзакции создаёт в фоне миниатюру изображения
+    image_field объекта instance и записывает её имя в thumbnail_field;
+    затем рассылает thumbnail_created.
+    """
+    image = getattr(instance, image_field)
+    if not image:
+        return
+    name = image.name
+    target = thumbnail_name(name)
+    if getattr(instance, thumbnail_field) == target:
+        return
+    model = type(instance)
+
+    def mark_ready():
+        marked = model.objects.filter(
+            pk=instance.pk, **{image_field: name}
+        ).update(**{thumbnail_field: target})
+        if marked:
+            thumbnail_created.send(sender=model, instance=instance)
+
+    def run():
+        if default_storage.exists(target):
+            mark_ready()
+            return
+        args = (default_storage.path(name), default_storage.path(target),
+                THUMBNAIL_SIZE)
+        executor = get_executor()
+        if executor is None:
+            make_thumbnail(*args)
+            mark_ready()
+        else:
+            executor.submit(make_thumbnail, *args).add_done_callback(
+                partial(_thumbnail_done, mark_ready)
+            )
+
+    transaction.on_commit(run)
+
+
+class Base64ImageField(BaseBase64ImageField):
+    """
+    Base64-изображение, декодируемое частями во временный файл, а не
+    целиком в памяти, и проверяемое Pillow. Проверка идёт в потоке
+    запроса: передача в пул процессов её бы не ускорила.
+    """
+
+    def to_internal_value(self, base64_data):
+        if base64_data in self.EMPTY_VALUES or not isinstance(
+            base64_data, str
+        ):
+            return super().to_internal_value(base64_data)
+
+        if ";base64," in base64_data:
+            base64_data = base64_data.split(";base64,", 1)[1]
+        # Пробелы и переводы строк сдвинули бы границы частей
+        # относительно групп из четырёх символов.
+        base64_data = "".join(base64_data.split())
+
+        file = tempfile.NamedTemporaryFile(
+            suffix=".upload", dir=settings.FILE_UPLOAD_TEMP_DIR
+        )
+        try:
+            for start in range(0, len(base64_data), BASE64_CHUNK_SIZE):
+                file.write(base64.b64decode(
+                    base64_data[start:start + BASE64_CHUNK_SIZE]
+                ))
+            file.flush()
+            image_format = inspect_image(file.name)
+        except (binascii.Error, ValueError, OSError, SyntaxError):
+            file.close()
+            raise serializers.ValidationError(self.INVALID_FILE_MESSAGE)
+
+        extension = EXTENSIONS.get(image_format)
+        if extension is None:
+            file.close()
+            raise serializers.ValidationError(self.INVALID_TYPE_MESSAGE)
+        file.seek(0)
+        return serializers.FileField.to_internal_value(
+            self, File(file, name=f"{uuid.uuid4()}.{extension}")
+        )
+
+
+class ThumbnailField(serializers.ReadOnlyField):
+    """
+    Ссылка на миниатюру изображения image_field, пока её нет — на
+    оригинал. Готовность берётся из поля thumbnail_field того же
+    объекта, без обращения к хранилищу.
+    """
+
+    def __init__(self, image_field, thumbnail_field, **kwargs):
+        kwargs.setdefault("source", "*")
+        super().__init__(**kwargs)
+        self.image_field = image_field
+        self.thumbnail_field = thumbnail_field
+
+    def to_representation(self, value):
+        image = getattr(value, self.image_field)
+        if not image:
+            return None
+        thumbnail = getattr(value, self.thumbnail_field)
+        url = (
+            default_storage.url(thumbnail)
+            if thumbnail_ready(image.name, thumbnail) else image.url
+        )
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
@@ -0,0 +1,278 @@
+import json
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+
+from recipe.models import Recipe, RecipeIngredient, Tag
+from users.models import User
+
+# (название, метод, путь, нужна ли авторизация)
+SCENARIO = (
+    ("tags", "get", "/api/tags/", False),
+    ("tag", "get", "/api/tags/{tag}/", False),
+    ("ingredients search", "get", "/api/ingredients/?name={prefix}", False),
+    ("ingredient", "get", "/api/ingredients/{ingredient}/", False),
+    ("recipes anonymous", "get", "/api/recipes/", False),
+    ("recipes", "get", "/api/recipes/", True),
+    (
+        "recipes filtered", "get",
+        "/api/recipes/?tags={tag_slug}&is_favorited=1", True,
+    ),
+    ("recipes search", "get", "/api/recipes/?search={word}", False),
+    ("recipe", "get", "/api/recipes/{recipe}/", True),
+    ("recipe link", "get", "/api/recipes/{recipe}/get-link/", False),
+    (
+        "recipes match", "get",
+        "/api/recipes/match/?ingredients={ingredients}", False,
+    ),
+    ("favorite add", "post", "/api/recipes/{target}/favorite/", True),
+    ("favorite remove", "delete", "/api/recipes/{target}/favorite/", True),
+    ("cart add", "post", "/api/recipes/{target}/shopping_cart/", True),
+    (
+        "shopping list", "get",
+        "/api/recipes/download_shopping_cart/", True,
+    ),
+    ("cart remove", "delete", "/api/recipes/{target}/shopping_cart/", True),
+    ("users", "get", "/api/users/", False),
+    ("user", "get", "/api/users/{author}/", True),
+    ("me", "get", "/api/users/me/", True),
+    ("subscribe", "post", "/api/users/{author}/subscribe/", True),
+    ("subscriptions", "get", "/api/users/subscriptions/", True),
+    ("unsubscribe", "delete", "/api/users/{author}/subscribe/", True),
+)
+
+
+def percentile(values, share):
+    """Перцентиль по ближайшему рангу для отсортированного списка."""
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+class LocalTransport:
+    """Запросы через тестовый клиент Django с подсчётом SQL-запросов."""
+
+    def __init__(self):
+        host = next(
+            (host for host in settings.ALLOWED_HOSTS if "*" not in host),
+            "testserver",
+        )
+        self.client = Client(raise_request_exception=False, HTTP_HOST=host)
+
+    def __call__(self, method, path, token):
+        headers = {"HTTP_AUTHORIZATION": f"Token {token}"} if token else {}
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = getattr(self.client, method)(path, **headers)
+            elapsed = time.perf_counter() - started
+        return elapsed, response.status_code, len(queries)
+
+    def close(self):
+        connection.close()
+
+
+class HTTPTransport:
+    """Запросы к запущенному серверу по HTTP."""
+
+    def __init__(self, url):
+        self.url = url.rstrip("/")
+
+    def __call__(self, method, path, token):
+        request = Request(self.url + path, method=method.upper())
+        if token:
+            request.add_header("Authorization", f"Token {token}")
+        started = time.perf_counter()
+        try:
+            with urlopen(request) as response:
+                response.read()
+                status = response.status
+        except HTTPError as error:
+            status = error.code
+        return time.perf_counter() - started, status, None
+
+    def close(self):
+        pass
+
+
+def prepare_contexts(concurrency):
+    """Данные сценария: по отдельному пользователю на поток."""
+    recipe = Recipe.objects.order_by("-id").first()
+    tag = Tag.objects.order_by("id").first()
+    if recipe is None or tag is None:
+        raise CommandError(
+            "Нет данных для сценария, выполните seed_benchmark."
+        )
+    ingredients = list(
+        RecipeIngredient.objects.filter(recipe=recipe).values_list(
+            "ingredient_id", flat=True
+        )
+    )
+    ingredient = RecipeIngredient.objects.filter(
+        recipe=recipe
+    ).values_list("ingredient__name", flat=True).first()
+    common = {
+        "recipe": recipe.id,
+        "tag": tag.id,
+        "tag_slug": tag.slug,
+        "ingredient": ingredients[0],
+        "ingredients": ",".join(map(str, ingredients)),
+        "prefix": ingredient[:3],
+        "word": recipe.name.split()[0],
+    }
+    users = list(User.objects.filter(is_active=True).order_by("id")[
+        :concurrency
+    ])
+    if len(users) < concurrency:
+        raise CommandError(
+            f"Нужно не меньше {concurrency} пользователей."
+        )
+    contexts = []
+    for user in users:
+        target = Recipe.objects.exclude(author=user).exclude(
+            favorite__user=user
+        ).exclude(shoppingcart__user=user).order_by("id").first()
+        author = User.objects.exclude(id=user.id).exclude(
+            followers__user=user
+        ).order_by("id").first()
+        if target is None or author is None:
+            raise CommandError(
+                f"Для пользователя {user} нет свободного рецепта "
+                "или автора для сценария."
+            )
+        contexts.append({
+            **common,
+            "token": Token.objects.get_or_create(user=user)[0].key,
+            "target": target.id,
+            "author": author.id,
+        })
+    return contexts
+
+
+def run_scenario(scenario, contexts, iterations, warmup=1, url=None):
+    """
+    Прогоняет scenario в потоке на каждый контекст из prepare_contexts.
+    Возвращает замеры (время, статус, число SQL) по маршрутам и общее
+    время прогона.
+    """
+    results = defaultdict(list)
+
+    def worker(context):
+        transport = HTTPTransport(url) if url else LocalTransport()
+        samples = []
+        try:
+            for iteration in range(warmup + iterations):
+                for name, method, path, auth in scenario:
+                    sample = transport(
+                        method,
+                        path.format(**context),
+                        context["token"] if auth else None,
+                    )
+                    if iteration >= warmup:
+                        samples.append((name, sample))
+        finally:
+            transport.close()
+        return samples
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(len(contexts)) as executor:
+        for samples in executor.map(worker, contexts):
+            for name, sample in samples:
+                results[name].append(sample)
+    return results, time.perf_counter() - started
+
+
+def summarize(scenario, results):
+    """Перцентили задержек в миллисекундах, SQL и статусы по маршрутам."""
+    routes = {}
+    for name, *_ in scenario:
+        samples = results[name]
+        durations = sorted(sample[0] * 1000 for sample in samples)
+        queries = [sample[2] for sample in samples if sample[2] is not None]
+        routes[name] = {
+            "n": len(samples),
+            "p50": round(percentile(durations, 0.50), 2),
+            "p95": round(percentile(durations, 0.95), 2),
+            "p99": round(percentile(durations, 0.99), 2),
+            "queries": (
+                round(sum(queries) / len(queries), 1) if queries else None
+            ),
+            "statuses": sorted({sample[1] for sample in samples}),
+        }
+    return routes
+
+
+class Command(BaseCommand):
+    help = (
+        "Прогоняет сценарий по всем маршрутам API и выводит задержки "
+        "p50/p95/p99, пропускную способность и число SQL-запросов."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--warmup", type=int, default=1)
+        parser.add_argument("--concurrency", type=int, default=1)
+        parser.add_argument(
+            "--url",
+            help="Адрес запущенного сервера. Без него запросы "
+                 "выполняются в текущем процессе.",
+        )
+        parser.add_argument(
+            "--routes",
+            help="Названия маршрутов сценария через запятую, "
+                 "по умолчанию все.",
+        )
+        parser.add_argument("--output", help="Сохранить результаты в JSON.")
+
+    def handle(self, *args, **options):
+        scenario = SCENARIO
+        if options["routes"]:
+            names = set(options["routes"].split(","))
+            scenario = [step for step in SCENARIO if step[0] in names]
+            if len(scenario) != len(names):
+                raise CommandError(
+                    "Неизвестные маршруты: "
+                    f"{', '.join(names - {step[0] for step in SCENARIO})}."
+                )
+        contexts = prepare_contexts(options["concurrency"])
+        results, elapsed = run_scenario(
+            scenario, contexts, options["iterations"], options["warmup"],
+            options["url"],
+        )
+
+        report = self.report(scenario, results, elapsed)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+
+    def report(self, scenario, results, elapsed):
+        total = sum(len(samples) for samples in results.values())
+        self.stdout.write(
+            f"{'маршрут':<20}{'n':>6}{'p50':>9}{'p95':>9}{'p99':>9}"
+            f"{'SQL':>6}  статусы"
+        )
+        report = {
+            "requests": total,
+            "seconds": round(elapsed, 3),
+            "rps": round(total / elapsed, 1),
+        }
+        report["routes"] = summarize(scenario, results)
+        for name, route in report["routes"].items():
+            queries = route["queries"]
+            self.stdout.write(
+                f"{name:<20}{route['n']:>6}{route['p50']:>9}"
+                f"{route['p95']:>9}{route['p99']:>9}"
+                f"{'-' if queries is None else queries:>6}  "
+                f"{','.join(map(str, route['statuses']))}"
+            )
+        self.stdout.write(
+            f"Всего {total} запросов за {elapsed:.2f} с, "
+            f"{report['rps']} запросов/с."
+        )
+        return report
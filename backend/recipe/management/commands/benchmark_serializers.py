@@ -0,0 +1,108 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from foodgram_backend.renderers import ORJSONRenderer
+from recipe.fast_serializers import (build_recipes, fetch_related, recipe_rows,
+                                     serialize_recipes)
+from recipe.views import RecipeViewSet
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет скорость RecipeSerializer и быстрых сериализаторов "
+        "в объектах в секунду. Совпадение их JSON проверяет "
+        "tests/test_fast_serializers.py."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--limit", type=int, default=200,
+            help="Сколько последних рецептов сериализовать.",
+        )
+        parser.add_argument(
+            "--user", type=int,
+            help="id пользователя для флагов избранного и подписок; "
+                 "по умолчанию первый пользователь с избранным.",
+        )
+        parser.add_argument(
+            "--rounds", type=int, default=50,
+            help="Число прогонов замера скорости.",
+        )
+
+    def handle(self, *args, **options):
+        self.benchmark(
+            self.get_user(options["user"]), options["limit"],
+            options["rounds"],
+        )
+
+    def get_user(self, user_id):
+        users = User.objects.all()
+        if user_id is not None:
+            return users.get(pk=user_id)
+        user = (
+            users.filter(favorites__isnull=False).first() or users.first()
+        )
+        if user is None:
+            raise CommandError("В базе нет пользователей.")
+        return user
+
+    def recipe_view(self, user):
+        host = next(
+            (host for host in settings.ALLOWED_HOSTS if "*" not in host),
+            "testserver",
+        )
+        request = Request(
+            APIRequestFactory().get("/api/recipes/", HTTP_HOST=host)
+        )
+        request.user = user
+        return RecipeViewSet(
+            request=request, format_kwarg=None, kwargs={}, action="list"
+        )
+
+    def benchmark(self, user, limit, rounds):
+        view = self.recipe_view(user)
+        queryset = view.get_queryset()[:limit]
+        instances = list(queryset)
+        rows = list(recipe_rows(queryset))
+        related = fetch_related(rows, user)
+        variants = (
+            (
+                "RecipeSerializer + JSONRenderer, с запросами",
+                lambda: JSONRenderer().render(
+                    view.get_serializer(list(queryset.all()), many=True).data
+                ),
+            ),
+            (
+                "fast_serializers + ORJSONRenderer, с запросами",
+                lambda: ORJSONRenderer().render(
+                    serialize_recipes(recipe_rows(queryset), view.request)
+                ),
+            ),
+            (
+                "RecipeSerializer + JSONRenderer, только сериализация",
+                lambda: JSONRenderer().render(
+                    view.get_serializer(instances, many=True).data
+                ),
+            ),
+            (
+                "fast_serializers + ORJSONRenderer, только сериализация",
+                lambda: ORJSONRenderer().render(
+                    build_recipes(rows, related, view.request)
+                ),
+            ),
+        )
+        for label, func in variants:
+            func()
+            started = time.perf_counter()
+            for _ in range(rounds):
+                func()
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{label}: {len(rows) * rounds / elapsed:,.0f} объектов/с"
+            )
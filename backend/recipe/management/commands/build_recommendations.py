@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from recipe.cooccurrence import build_similar_recipes
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает похожие рецепты по совместным добавлениям в "
+        "избранное: только затронутые изменениями с прошлого запуска "
+        "или все с --full."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Пересчитать все рецепты, а не только изменившиеся.",
+        )
+
+    def handle(self, *args, **options):
+        count = build_similar_recipes(full=options["full"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Пересчитано рецептов: {count}.")
+        )
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from shopping.aggregates import (apply_diff, batches, diff_items,
+                                 expected_totals)
+from shopping.models import ShoppingCart, ShoppingListItem
+
+
+class Command(BaseCommand):
+    help = (
+        "Сверяет списки покупок с корзинами пользователей; "
+        "с --fix исправляет расхождения."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fix", action="store_true")
+
+    def handle(self, *args, **options):
+        users = sorted(
+            set(ShoppingCart.objects.values_list("user_id", flat=True))
+            | set(ShoppingListItem.objects.values_list("user_id", flat=True))
+        )
+        stale_total = changed_total = added_total = 0
+        for user_ids in batches(users):
+            with transaction.atomic():
+                stale, changed, added = diff_items(
+                    ShoppingListItem.objects.filter(
+                        user_id__in=user_ids
+                    ).select_for_update(),
+                    expected_totals(recipe__shoppingcart__user__in=user_ids),
+                )
+                if options["fix"]:
+                    apply_diff(stale, changed, added)
+            stale_total += len(stale)
+            changed_total += len(changed)
+            added_total += len(added)
+        message = (
+            f"Пользователей: {len(users)}. Лишних позиций: {stale_total}, "
+            f"неверных количеств: {changed_total}, "
+            f"недостающих позиций: {added_total}."
+        )
+        if not options["fix"] and stale_total + changed_total + added_total:
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS(message))
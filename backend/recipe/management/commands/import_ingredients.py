@@ -0,0 +1,167 @@
+import csv
+import io
+import json
+import time
+from itertools import islice
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from foodgram_backend.constants import (IMPORT_BATCH_SIZE, NAME_LENGTH,
+                                        UNIT_LENGTH)
+from recipe.cache import INGREDIENTS, RECIPES, bump_on_commit
+from recipe.catalog import catalog
+from recipe.detail_cache import ALL_DETAILS, invalidate
+from recipe.models import Ingredient
+
+FORMATS = ("csv", "json", "jsonl")
+
+
+def read_csv(file):
+    for row in csv.reader(file):
+        if len(row) >= 2:
+            yield row[0], row[1]
+
+
+def read_json(file):
+    for item in json.load(file):
+        yield item.get("name", ""), item.get("measurement_unit", "")
+
+
+def read_jsonl(file):
+    for line in file:
+        if line.strip():
+            item = json.loads(line)
+            yield item.get("name", ""), item.get("measurement_unit", "")
+
+
+READERS = {"csv": read_csv, "json": read_json, "jsonl": read_jsonl}
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Импорт ингредиентов из CSV (название,единица), JSON-массива или "
+        "JSON Lines с обновлением единиц измерения у существующих."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", type=Path)
+        parser.add_argument("--format", choices=FORMATS)
+        parser.add_argument(
+            "--batch-size", type=int, default=IMPORT_BATCH_SIZE
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or path.suffix.lstrip(".").lower()
+        if file_format not in READERS:
+            raise CommandError(
+                f"Неизвестный формат {file_format!r}, ожидается один из "
+                f"{', '.join(FORMATS)}."
+            )
+        if not path.exists():
+            raise CommandError(f"Файл {path} не найден.")
+
+        self.skipped = 0
+        started = time.monotonic()
+        with path.open(encoding="utf-8") as file, transaction.atomic():
+            rows = self.clean(READERS[file_format](file))
+            if connection.vendor == "postgresql":
+                total = self.copy_upsert(rows, options["batch_size"])
+            else:
+                total = self.bulk_upsert(rows, options["batch_size"])
+            # Воркеры узнают об импорте из CatalogVersion в базе (справочник
+            # и индекс поиска) и из версий в общем кэше (ответы API).
+            catalog.changed()
+            bump_on_commit(INGREDIENTS, RECIPES)
+            invalidate(ALL_DETAILS)
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Обработано {total} строк за {elapsed:.2f} с "
+                f"({total / elapsed if elapsed else total:.0f} строк/с), "
+                f"пропущено {self.skipped}."
+            )
+        )
+
+    def clean(self, rows):
+        """Отбрасывает пустые и не помещающиеся в модель строки."""
+        for name, unit in rows:
+            name, unit = name.strip(), unit.strip()
+            if (
+                not name or not unit
+                or len(name) > NAME_LENGTH or len(unit) > UNIT_LENGTH
+            ):
+                self.skipped += 1
+                continue
+            yield name, unit
+
+    def copy_upsert(self, rows, batch_size):
+        """
+        Загрузка через COPY во временную таблицу и один
+        INSERT ... ON CONFLICT, последняя строка с тем же названием
+        побеждает.
+        """
+        table = Ingredient._meta.db_table
+        total = 0
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "CREATE TEMPORARY TABLE ingredient_import ("
+                "seq bigserial, name varchar, measurement_unit varchar"
+                ") ON COMMIT DROP"
+            )
+            for batch in batches(rows, batch_size):
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(batch)
+                buffer.seek(0)
+                cursor.copy_expert(
+                    "COPY ingredient_import (name, measurement_unit) "
+                    "FROM STDIN WITH (FORMAT csv)",
+                    buffer,
+                )
+                total += len(batch)
+            cursor.execute(
+                f"INSERT INTO {table} (name, measurement_unit) "
+                "SELECT DISTINCT ON (name) name, measurement_unit "
+                "FROM ingredient_import ORDER BY name, seq DESC "
+                "ON CONFLICT (name) DO UPDATE "
+                "SET measurement_unit = EXCLUDED.measurement_unit "
+                f"WHERE {table}.measurement_unit "
+                "IS DISTINCT FROM EXCLUDED.measurement_unit"
+            )
+        return total
+
+    def bulk_upsert(self, rows, batch_size):
+        """Пакетная вставка новых и обновление изменившихся строк."""
+        total = 0
+        for batch in batches(rows, batch_size):
+            units = dict(batch)
+            existing = Ingredient.objects.in_bulk(
+                list(units), field_name="name"
+            )
+            changed = []
+            for name, ingredient in existing.items():
+                if ingredient.measurement_unit != units[name]:
+                    ingredient.measurement_unit = units[name]
+                    changed.append(ingredient)
+            Ingredient.objects.bulk_update(changed, ["measurement_unit"])
+            Ingredient.objects.bulk_create(
+                [
+                    Ingredient(name=name, measurement_unit=unit)
+                    for name, unit in units.items()
+                    if name not in existing
+                ],
+                ignore_conflicts=True,
+            )
+            total += len(batch)
+        return total
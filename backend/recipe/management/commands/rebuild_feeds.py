@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from shopping.aggregates import batches
+from users import feed
+from users.models import Subscription
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересобирает ленты подписок по текущим подпискам, например "
+        "после массовой загрузки данных."
+    )
+
+    def handle(self, *args, **options):
+        users = sorted(
+            set(Subscription.objects.values_list("user_id", flat=True))
+        )
+        for user_ids in batches(users):
+            feed.rebuild(user_ids)
+        self.stdout.write(
+            self.style.SUCCESS(f"Пересобрано лент: {len(users)}.")
+        )
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from recipe.counters import recount_favorites, recount_profiles
+from recipe.models import Recipe
+from shopping.models import Favorite
+from users.models import Subscription, UserProfile
+
+
+class Command(BaseCommand):
+    help = (
+        "Пересчитывает денормализованные счётчики избранного, "
+        "рецептов и подписчиков."
+    )
+
+    def handle(self, *args, **options):
+        favorites = recount_favorites(Recipe, Favorite)
+        profiles = recount_profiles(UserProfile, Recipe, Subscription)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Исправлено счётчиков: рецепты — {favorites}, "
+                f"профили — {profiles}."
+            )
+        )
@@ -0,0 +1,248 @@
+import io
+import random
+import time
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from PIL import Image
+
+from foodgram_backend.constants import THUMBNAIL_SIZE
+from recipe.cache import INGREDIENTS, RECIPES, TAGS, bump_version
+from recipe.catalog import catalog
+from recipe.counters import recount_favorites, recount_profiles
+from recipe.detail_cache import ALL_DETAILS, invalidate
+from recipe.images import make_thumbnail, thumbnail_name
+from recipe.models import Ingredient, Recipe, RecipeIngredient, Tag
+from recipe.search import update_search_vectors
+from shopping.models import Favorite, ShoppingCart
+from users.models import Subscription, User, UserProfile
+
+SEED_IMAGE = "recipes/seed.png"
+SEED_TAGS = (
+    ("Завтрак", "breakfast"), ("Обед", "lunch"), ("Ужин", "dinner"),
+    ("Десерт", "dessert"), ("Выпечка", "bakery"), ("Суп", "soup"),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Заполняет базу синтетическими данными для нагрузочного "
+        "тестирования. Объёмы по умолчанию умножаются на --scale."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", type=float, default=1.0)
+        parser.add_argument("--users", type=int, default=100_000)
+        parser.add_argument("--recipes", type=int, default=1_000_000)
+        parser.add_argument(
+            "--ingredients-per-recipe", type=int, default=10
+        )
+        parser.add_argument(
+            "--subscriptions-per-user", type=int, default=20
+        )
+        parser.add_argument("--favorites-per-user", type=int, default=30)
+        parser.add_argument("--cart-per-user", type=int, default=5)
+        parser.add_argument(
+            "--skew",
+            type=float,
+            default=1.1,
+            help="Показатель закона Ципфа для популярности авторов "
+                 "и рецептов.",
+        )
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.skew = options["skew"]
+        scale = options["scale"]
+        users_total = max(2, int(options["users"] * scale))
+        recipes_total = max(1, int(options["recipes"] * scale))
+
+        started = time.monotonic()
+        tags = self.ensure_tags()
+        ingredients = self.ensure_ingredients()
+        self.ensure_image()
+        users = self.create_users(users_total)
+        recipes = self.create_recipes(
+            recipes_total, users, tags, ingredients,
+            options["ingredients_per_recipe"],
+        )
+        self.create_subscriptions(
+            users, options["subscriptions_per_user"]
+        )
+        self.create_user_recipes(
+            Favorite, users, recipes, options["favorites_per_user"]
+        )
+        self.create_user_recipes(
+            ShoppingCart, users, recipes, options["cart_per_user"]
+        )
+
+        self.log("Пересчёт счётчиков")
+        recount_favorites(Recipe, Favorite)
+        recount_profiles(UserProfile, Recipe, Subscription)
+        self.log("Ленты подписок")
+        call_command("rebuild_feeds", stdout=self.stdout)
+        self.log("Похожие рецепты")
+        call_command("build_recommendations", full=True, stdout=self.stdout)
+        # Запущенные воркеры узнают о новых данных из CatalogVersion в
+        # базе и из версий в общем кэше (REDIS_URL).
+        catalog.changed()
+        bump_version(TAGS, INGREDIENTS, RECIPES)
+        invalidate(ALL_DETAILS)
+        self.stdout.write(self.style.SUCCESS(
+            f"Готово за {time.monotonic() - started:.1f} с."
+        ))
+
+    def log(self, message):
+        self.stdout.write(message)
+
+    def batches(self, total):
+        for start in range(0, total, self.batch_size):
+            yield start, min(self.batch_size, total - start)
+
+    def zipf_weights(self, size):
+        """Накопленные веса закона Ципфа для random.choices."""
+        return list(accumulate(
+            1 / (rank ** self.skew) for rank in range(1, size + 1)
+        ))
+
+    def ensure_tags(self):
+        if not Tag.objects.exists():
+            Tag.objects.bulk_create(
+                Tag(name=name, slug=slug) for name, slug in SEED_TAGS
+            )
+        return list(Tag.objects.values_list("id", flat=True))
+
+    def ensure_ingredients(self):
+        if not Ingredient.objects.exists():
+            Ingredient.objects.bulk_create(
+                Ingredient(name=f"ингредиент {number}", measurement_unit="г")
+                for number in range(2000)
+            )
+        return list(Ingredient.objects.values_list("id", flat=True))
+
+    def ensure_image(self):
+        """Общая картинка рецептов с готовой миниатюрой."""
+        if not default_storage.exists(SEED_IMAGE):
+            buffer = io.BytesIO()
+            Image.new("RGB", (64, 64), "orange").save(buffer, "PNG")
+            default_storage.save(SEED_IMAGE, ContentFile(buffer.getvalue()))
+        thumbnail = thumbnail_name(SEED_IMAGE)
+        if not default_storage.exists(thumbnail):
+            make_thumbnail(
+                default_storage.path(SEED_IMAGE),
+                default_storage.path(thumbnail),
+                THUMBNAIL_SIZE,
+            )
+
+    def created_ids(self, model, objects):
+        """id созданных bulk_create объектов и там, где их не вернули."""
+        if objects and objects[0].pk is None:
+            return sorted(
+                model.objects.order_by("-id").values_list(
+                    "id", flat=True
+                )[:len(objects)]
+            )
+        return [obj.pk for obj in objects]
+
+    def create_users(self, total):
+        self.log(f"Пользователи: {total}")
+        password = make_password("benchmark")
+        offset = User.objects.count()
+        ids = []
+        for start, size in self.batches(total):
+            users = User.objects.bulk_create(
+                User(
+                    username=f"bench{offset + start + number}",
+                    email=f"bench{offset + start + number}@example.com",
+                    first_name="Бенчмарк",
+                    last_name=str(offset + start + number),
+                    password=password,
+                )
+                for number in range(size)
+            )
+            batch_ids = self.created_ids(User, users)
+            UserProfile.objects.bulk_create(
+                UserProfile(user_id=user_id) for user_id in batch_ids
+            )
+            ids.extend(batch_ids)
+        return ids
+
+    def create_recipes(self, total, users, tags, ingredients, per_recipe):
+        self.log(f"Рецепты: {total}")
+        authors = self.zipf_weights(len(users))
+        per_recipe = min(per_recipe, len(ingredients))
+        ids = []
+        for start, size in self.batches(total):
+            recipes = Recipe.objects.bulk_create(
+                Recipe(
+                    author_id=author,
+                    name=f"Рецепт {start + number}",
+                    text="Смешать ингредиенты и готовить до готовности.",
+                    image=SEED_IMAGE,
+                    image_thumbnail=thumbnail_name(SEED_IMAGE),
+                    cooking_time=self.random.randint(5, 180),
+                )
+                for number, author in enumerate(self.random.choices(
+                    users, cum_weights=authors, k=size
+                ))
+            )
+            batch_ids = self.created_ids(Recipe, recipes)
+            RecipeIngredient.objects.bulk_create(
+                RecipeIngredient(
+                    recipe_id=recipe_id,
+                    ingredient_id=ingredient_id,
+                    amount=self.random.randint(1, 500),
+                )
+                for recipe_id in batch_ids
+                for ingredient_id in self.random.sample(
+                    ingredients, per_recipe
+                )
+            )
+            Recipe.tags.through.objects.bulk_create(
+                Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+                for recipe_id in batch_ids
+                for tag_id in self.random.sample(
+                    tags, self.random.randint(1, min(3, len(tags)))
+                )
+            )
+            update_search_vectors(batch_ids)
+            ids.extend(batch_ids)
+        return ids
+
+    def create_subscriptions(self, users, per_user):
+        self.log(f"Подписки: ~{per_user} на пользователя")
+        weights = self.zipf_weights(len(users))
+        for start, size in self.batches(len(users)):
+            Subscription.objects.bulk_create(
+                (
+                    Subscription(user_id=user_id, author_id=author_id)
+                    for user_id in users[start:start + size]
+                    for author_id in set(self.random.choices(
+                        users, cum_weights=weights, k=per_user
+                    ))
+                    if author_id != user_id
+                ),
+                ignore_conflicts=True,
+            )
+
+    def create_user_recipes(self, model, users, recipes, per_user):
+        self.log(f"{model._meta.verbose_name}: ~{per_user} на пользователя")
+        weights = self.zipf_weights(len(recipes))
+        for start, size in self.batches(len(users)):
+            model.objects.bulk_create(
+                (
+                    model(user_id=user_id, recipe_id=recipe_id)
+                    for user_id in users[start:start + size]
+                    for recipe_id in set(self.random.choices(
+                        recipes, cum_weights=weights, k=per_user
+                    ))
+                ),
+                ignore_conflicts=True,
+            )
@@ -0,0 +1,117 @@
+import heapq
+import threading
+import time
+from array import array
+from collections import defaultdict
+
+from foodgram_backend.constants import INGREDIENT_INDEX_TTL
+
+from .models import RecipeIngredient
+
+COVERAGE = "coverage"
+JACCARD = "jaccard"
+
+
+class RecipeMatchIndex:
+    """
+    Индекс «что можно приготовить»: для рецепта — отсортированный массив
+    id ингредиентов, для ингредиента — множество рецептов с ним.
+
+    Рецепты обновляются по одному через refresh/remove из сигналов,
+    а целиком индекс перечитывается по истечении TTL, чтобы подхватить
+    изменения из других воркеров.
+    """
+
+    def __init__(self, ttl=INGREDIENT_INDEX_TTL):
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._recipes = {}
+        self._postings = defaultdict(set)
+        self._loaded_at = None
+
+    def _ensure_loaded(self):
+        if (
+            self._loaded_at is not None
+            and time.monotonic() - self._loaded_at < self.ttl
+        ):
+            return
+        recipes = defaultdict(list)
+        rows = RecipeIngredient.objects.values_list(
+            "recipe_id", "ingredient_id"
+        ).order_by("recipe_id", "ingredient_id")
+        for recipe_id, ingredient_id in rows.iterator():
+            recipes[recipe_id].append(ingredient_id)
+        postings = defaultdict(set)
+        for recipe_id, ingredients in recipes.items():
+            for ingredient_id in ingredients:
+                postings[ingredient_id].add(recipe_id)
+        self._recipes = {
+            recipe_id: array("q", ingredients)
+            for recipe_id, ingredients in recipes.items()
+        }
+        self._postings = postings
+        self._loaded_at = time.monotonic()
+
+    def _discard(self, recipe_id):
+        for ingredient_id in self._recipes.pop(recipe_id, ()):
+            postings = self._postings.get(ingredient_id)
+            if postings is not None:
+                postings.discard(recipe_id)
+                if not postings:
+                    del self._postings[ingredient_id]
+
+    def refresh(self, recipe_id):
+        """Перечитывает ингредиенты одного рецепта."""
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            ingredients = array("q", sorted(
+                RecipeIngredient.objects.filter(
+                    recipe_id=recipe_id
+                ).values_list("ingredient_id", flat=True)
+            ))
+            self._discard(recipe_id)
+            if ingredients:
+                self._recipes[recipe_id] = ingredients
+                for ingredient_id in ingredients:
+                    self._postings[ingredient_id].add(recipe_id)
+
+    def remove(self, recipe_id):
+        with self._lock:
+            self._discard(recipe_id)
+
+    def search(self, ingredient_ids, limit, score=COVERAGE):
+        """
+        До limit пар (id рецепта, оценка) по убыванию оценки.
+
+        coverage — доля ингредиентов рецепта, которые есть у
+        пользователя; jaccard — мера Жаккара двух множеств.
+        """
+        have = set(ingredient_ids)
+        with self._lock:
+            self._ensure_loaded()
+            common = defaultdict(int)
+            for ingredient_id in have:
+                for recipe_id in self._postings.get(ingredient_id, ()):
+                    common[recipe_id] += 1
+            sizes = {
+                recipe_id: len(self._recipes[recipe_id])
+                for recipe_id in common
+            }
+        if score == JACCARD:
+            scores = (
+                (count / (sizes[recipe_id] + len(have) - count), recipe_id)
+                for recipe_id, count in common.items()
+            )
+        else:
+            scores = (
+                (count / sizes[recipe_id], recipe_id)
+                for recipe_id, count in common.items()
+            )
+        return [
+            (recipe_id, value)
+            for value, recipe_id in heapq.nlargest(limit, scores)
+        ]
+
+
+match_index = RecipeMatchIndex()
@@ -0,0 +1,48 @@
+from django.db import migrations
+
+PREFIX_INDEX = "recipe_ingredient_name_prefix_idx"
+TRIGRAM_INDEX = "recipe_ingredient_name_trgm_idx"
+
+
+def create_indexes(apps, schema_editor):
+    """
+    Индексы под UPPER(name::text) LIKE ..., который Django строит для
+    istartswith/icontains. Только для PostgreSQL: на SQLite поиск
+    обходится уникальным индексом по name. Триграммный индекс
+    создаётся, если на сервере установлено расширение pg_trgm.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {PREFIX_INDEX} "
+        "ON recipe_ingredient (UPPER(name::text) text_pattern_ops)"
+    )
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'"
+        )
+        if cursor.fetchone() is None:
+            return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS {TRIGRAM_INDEX} "
+        "ON recipe_ingredient USING gin (UPPER(name::text) gin_trgm_ops)"
+    )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name in (PREFIX_INDEX, TRIGRAM_INDEX):
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipe", "0004_alter_recipe_cooking_time"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 3.2.3 on 2026-10-18 20:02
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_subquery(model, field, outer_field):
+    # Копия recipe.counters.count_subquery: миграция не зависит от
+    # текущего кода приложения.
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef(outer_field)})
+            .order_by()
+            .values(field)
+            .annotate(total=Count("pk"))
+            .values("total")
+        ),
+        0,
+    )
+
+
+def fill_favorites_count(apps, schema_editor):
+    Recipe = apps.get_model("recipe", "Recipe")
+    Favorite = apps.get_model("shopping", "Favorite")
+    Recipe.objects.update(
+        favorites_count=count_subquery(Favorite, "recipe", "pk")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0005_ingredient_name_search_indexes'),
+        ('shopping', '0003_alter_favorite_recipe'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Число добавлений в избранное'),
+        ),
+        migrations.RunPython(fill_favorites_count, migrations.RunPython.noop),
+    ]
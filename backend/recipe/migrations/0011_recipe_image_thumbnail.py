@@ -0,0 +1,49 @@
+# Generated by Django 3.2.3 on 2026-10-18 21:27
+
+import os
+
+from django.core.files.storage import default_storage
+from django.db import migrations, models
+
+# Копия recipe.images.thumbnail_name на момент создания миграции;
+# миниатюры сохранялись в WEBP или, без его поддержки в Pillow, в JPEG.
+THUMBNAIL_SIZE = 320
+THUMBNAIL_FORMATS = ("webp", "jpeg")
+
+
+def existing_thumbnail(name):
+    root = os.path.splitext(name)[0]
+    for extension in THUMBNAIL_FORMATS:
+        thumbnail = f"thumbs/{root}_{THUMBNAIL_SIZE}.{extension}"
+        if default_storage.exists(thumbnail):
+            return thumbnail
+    return ""
+
+
+def mark_existing_thumbnails(apps, schema_editor):
+    Recipe = apps.get_model("recipe", "Recipe")
+    for pk, name in (
+        Recipe.objects.exclude(image="").exclude(image__isnull=True)
+        .values_list("pk", "image").iterator()
+    ):
+        thumbnail = existing_thumbnail(name)
+        if thumbnail:
+            Recipe.objects.filter(pk=pk).update(image_thumbnail=thumbnail)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0010_catalog_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='image_thumbnail',
+            field=models.CharField(blank=True, editable=False, max_length=255, verbose_name='Готовая миниатюра изображения'),
+        ),
+        migrations.RunPython(
+            mark_existing_thumbnails, migrations.RunPython.noop
+        ),
+    ]
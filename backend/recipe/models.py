@@ -1,4 +1,5 @@
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 from django.core.validators import MinValueValidator
 from django.db import models
 
@@ -8,6 +9,21 @@ from foodgram_backend.constants import (NAME_LENGTH, UNIT_LENGTH,
 User = get_user_model()
 
 
+def safe_update_fields(instance):
+    """
+    Поля для сохранения существующего объекта без полей из
+    maintained_fields, которые обновляются отдельными запросами;
+    None для новых объектов.
+    """
+    if instance._state.adding:
+        return None
+    return [
+        field.name for field in instance._meta.concrete_fields
+        if not field.primary_key
+        and field.name not in instance.maintained_fields
+    ]
+
+
 class Ingredient(models.Model):
     """Модель ингридиента."""
 
@@ -49,6 +65,23 @@ class Tag(models.Model):
         return self.name
 
 
+class CatalogVersion(models.Model):
+    """
+    Единственная строка со счётчиком изменений ингредиентов и тегов;
+    по нему воркеры перезагружают справочник в памяти (recipe.catalog).
+    """
+    version = models.PositiveBigIntegerField(
+        default=0, verbose_name="Версия справочника"
+    )
+
+    class Meta:
+        verbose_name = "Версия справочника"
+        verbose_name_plural = "Версия справочника"
+
+    def __str__(self):
+        return str(self.version)
+
+
 class Recipe(models.Model):
     """Модель рецепта."""
 
@@ -60,6 +93,12 @@ class Recipe(models.Model):
     )
     name = models.TextField(max_length=NAME_LENGTH, verbose_name="Название")
     image = models.ImageField(upload_to="recipes/")
+    image_thumbnail = models.CharField(
+        max_length=255,
+        blank=True,
+        editable=False,
+        verbose_name="Готовая миниатюра изображения",
+    )
     text = models.TextField(verbose_name="Описание")
     ingredients = models.ManyToManyField(
         Ingredient,
@@ -78,15 +117,41 @@ class Recipe(models.Model):
         validators=[MinValueValidator(VALIDATOR_COUNT)],
         help_text="Минимальное время приготовление - 1 минута."
     )
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name="Число добавлений в избранное"
+    )
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    maintained_fields = (
+        "favorites_count", "search_vector", "image_thumbnail"
+    )
 
     class Meta:
         verbose_name = "Рецепт"
         verbose_name_plural = "Рецепты"
         ordering = ["-id"]
+        indexes = [
+            models.Index(
+                fields=["author", "-id"], name="recipe_author_id_desc_idx"
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        """
+        Счётчики и поисковый вектор обновляются отдельными запросами,
+        поэтому обычное сохранение существующего рецепта их не
+        перезаписывает.
+        """
+        kwargs.setdefault(
+            "update_fields", safe_update_fields(self)
+        )
+        super().save(*args, **kwargs)
+
 
 class RecipeIngredient(models.Model):
     """Промежуточная модель дял рецептов и ингредиентов."""
@@ -122,3 +187,50 @@ class RecipeIngredient(models.Model):
             f"{self.ingredient.name} — {self.amount} "
             f"{self.ingredient.measurement_unit}"
         )
+
+
+class SimilarRecipe(models.Model):
+    """
+    Похожий рецепт: одна из SIMILAR_RECIPES_TOP_K строк рецепта с
+    наибольшей косинусной близостью по добавлениям в избранное.
+    Заполняется командой build_recommendations.
+    """
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="similar_recipes",
+        verbose_name="Рецепт"
+    )
+    similar = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="Похожий рецепт"
+    )
+    score = models.FloatField(verbose_name="Близость")
+
+    class Meta:
+        verbose_name = "Похожий рецепт"
+        verbose_name_plural = "Похожие рецепты"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["recipe", "similar"],
+                name="unique_similar_recipe"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.recipe_id} ~ {self.similar_id}: {self.score:.3f}"
+
+
+class RecommendationChange(models.Model):
+    """
+    Изменение избранного, которое ещё не учтено в похожих рецептах.
+    Ссылка на рецепт без внешнего ключа: отметка может появиться при
+    каскадном удалении самого рецепта.
+    """
+    recipe_id = models.BigIntegerField(verbose_name="id рецепта")
+
+    class Meta:
+        verbose_name = "Изменение избранного"
+        verbose_name_plural = "Изменения избранного"
@@ -1,4 +1,4 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from rest_framework.response import Response
 
 from foodgram_backend.constants import PAGINTAION_NUMBER
@@ -19,3 +19,35 @@ class CustomPagination(PageNumberPagination):
                 "results": data,
             }
         )
+
+
+class RecipeCursorPagination(CursorPagination):
+    """
+    Пагинация по ключу без COUNT(*) и OFFSET: стоимость страницы
+    не зависит от её глубины. Включается параметром cursor
+    (пустым для первой страницы).
+    """
+
+    page_size = PAGINTAION_NUMBER
+    page_size_query_param = "limit"
+    ordering = "-id"
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+
+class SubscriptionCursorPagination(RecipeCursorPagination):
+    """Пагинация подписок по ключу (created_at, id)."""
+
+    ordering = ("created_at", "id")
+
+
+def use_cursor_pagination(request):
+    """Запрошена ли пагинация по ключу."""
+    return RecipeCursorPagination.cursor_query_param in request.query_params
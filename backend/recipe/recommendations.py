@@ -0,0 +1,45 @@
+from django.db.models import Sum
+
+from foodgram_backend.constants import RECOMMENDATION_SEED_FAVORITES
+from shopping.models import Favorite
+
+from .models import RecommendationChange, SimilarRecipe
+
+
+def mark_changed(recipe_ids):
+    """
+    Отмечает рецепты, у которых изменилось избранное; следующий запуск
+    build_recommendations пересчитает их и их соседей.
+    """
+    RecommendationChange.objects.bulk_create(
+        [RecommendationChange(recipe_id=recipe_id) for recipe_id in recipe_ids]
+    )
+
+
+def similar_ids(recipe_id, limit):
+    """Id похожих рецептов по убыванию близости."""
+    return list(
+        SimilarRecipe.objects.filter(recipe_id=recipe_id)
+        .order_by("-score", "similar_id")
+        .values_list("similar_id", flat=True)[:limit]
+    )
+
+
+def recommended_ids(user, limit):
+    """
+    Рекомендации пользователю: похожие рецепты последних
+    RECOMMENDATION_SEED_FAVORITES избранных с суммой близостей, без
+    уже добавленных в избранное.
+    """
+    favorites = Favorite.objects.filter(user=user)
+    seeds = favorites.order_by("-added_at").values("recipe_id")[
+        :RECOMMENDATION_SEED_FAVORITES
+    ]
+    return list(
+        SimilarRecipe.objects.filter(recipe_id__in=seeds)
+        .exclude(similar_id__in=favorites.values("recipe_id"))
+        .values("similar_id")
+        .annotate(total=Sum("score"))
+        .order_by("-total", "similar_id")
+        .values_list("similar_id", flat=True)[:limit]
+    )
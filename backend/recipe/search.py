@@ -0,0 +1,224 @@
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchVector
+from django.db import connection
+from django.db.models import OuterRef, Subquery, TextField, Value
+from django.db.models.functions import Coalesce
+
+from foodgram_backend.constants import INGREDIENT_INDEX_TTL
+
+from .catalog import catalog
+from .models import Recipe, RecipeIngredient
+
+SEARCH_CONFIG = "russian"
+SEARCH_WEIGHTS = {"A": 1.0, "B": 0.4, "C": 0.2}
+TOKEN_RE = re.compile(r"\w+")
+
+
+class IngredientPrefixIndex:
+    """
+    Отсортированный массив названий ингредиентов в памяти процесса.
+
+    Префиксный поиск выполняется бинарным поиском, остаток выдачи
+    добирается совпадениями по подстроке. Индекс строится из среза
+    справочника recipe.catalog и перестраивается, когда справочник
+    загружает новую версию: изменения из других воркеров и
+    management-команд приходят через CatalogVersion в базе.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys = []
+        self._records = []
+        self._snapshot = None
+
+    def _load(self, snapshot):
+        records = sorted(
+            (
+                {
+                    "id": record.id,
+                    "name": record.name,
+                    "measurement_unit": record.measurement_unit,
+                }
+                for record in snapshot.ingredients.values()
+            ),
+            key=lambda record: (record["name"].upper(), record["id"]),
+        )
+        self._keys = [record["name"].upper() for record in records]
+        self._records = records
+        self._snapshot = snapshot
+
+    def _ensure_loaded(self):
+        snapshot = catalog.snapshot()
+        if self._snapshot is snapshot:
+            return
+        with self._lock:
+            if self._snapshot is not snapshot:
+                self._load(snapshot)
+
+    def search(self, value, limit):
+        """Ингредиенты, начинающиеся с value, затем содержащие value."""
+        self._ensure_loaded()
+        keys, records = self._keys, self._records
+        needle = value.upper()
+        start = bisect_left(keys, needle)
+        end = start
+        while end < len(keys) and end - start < limit:
+            if not keys[end].startswith(needle):
+                break
+            end += 1
+        result = records[start:end]
+        if len(result) < limit:
+            for key, record in zip(keys, records):
+                if needle in key and not key.startswith(needle):
+                    result.append(record)
+                    if len(result) == limit:
+                        break
+        return result
+
+
+ingredient_index = IngredientPrefixIndex()
+
+
+def update_search_vectors(recipe_ids):
+    """
+    Пересчитывает search_vector рецептов: название (вес A),
+    описание (B) и названия ингредиентов (C). Только для PostgreSQL.
+    """
+    if connection.vendor != "postgresql" or not recipe_ids:
+        return
+    ingredient_names = Subquery(
+        RecipeIngredient.objects.filter(recipe=OuterRef("pk"))
+        .order_by()
+        .values("recipe")
+        .annotate(names=StringAgg("ingredient__name", " "))
+        .values("names")
+    )
+    Recipe.objects.filter(pk__in=recipe_ids).update(
+        search_vector=(
+            SearchVector("name", weight="A", config=SEARCH_CONFIG)
+            + SearchVector("text", weight="B", config=SEARCH_CONFIG)
+            + SearchVector(
+                Coalesce(
+                    ingredient_names, Value(""), output_field=TextField()
+                ),
+                weight="C",
+                config=SEARCH_CONFIG,
+            )
+        )
+    )
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+class InvertedIndex:
+    """
+    Инвертированный индекс рецептов на Python для баз без полнотекстового
+    поиска (SQLite в тестах). Слово запроса совпадает со словами,
+    начинающимися с него, что грубо заменяет стемминг.
+    """
+
+    def __init__(self):
+        self.postings = defaultdict(lambda: defaultdict(float))
+        self.tokens = defaultdict(set)
+
+    def add(self, recipe_id, weight, text):
+        for token in tokenize(text):
+            self.postings[token][recipe_id] += SEARCH_WEIGHTS[weight]
+            self.tokens[recipe_id].add(token)
+
+    def extend(self, queryset):
+        """Добавляет рецепты queryset с их ингредиентами."""
+        for pk, name, text in queryset.values_list("id", "name", "text"):
+            self.add(pk, "A", name)
+            self.add(pk, "B", text)
+        for pk, name in RecipeIngredient.objects.filter(
+            recipe__in=queryset.values("pk")
+        ).values_list("recipe_id", "ingredient__name"):
+            self.add(pk, "C", name)
+
+    def discard(self, recipe_id):
+        for token in self.tokens.pop(recipe_id, ()):
+            postings = self.postings.get(token)
+            if postings is not None:
+                postings.pop(recipe_id, None)
+                if not postings:
+                    del self.postings[token]
+
+    def search(self, query):
+        """Рецепты, содержащие все слова запроса, по убыванию ранга."""
+        scores = None
+        for word in tokenize(query):
+            matches = defaultdict(float)
+            for token, postings in self.postings.items():
+                if token.startswith(word):
+                    for pk, weight in postings.items():
+                        matches[pk] += weight
+            if scores is None:
+                scores = matches
+            else:
+                scores = {
+                    pk: score + matches[pk]
+                    for pk, score in scores.items() if pk in matches
+                }
+        return sorted(
+            (scores or {}).items(), key=lambda item: (-item[1], -item[0])
+        )
+
+
+class RecipeSearchIndex:
+    """
+    InvertedIndex всех рецептов в памяти процесса. Как и
+    recipe.matching.RecipeMatchIndex, рецепты обновляются по одному
+    через refresh/remove из сигналов, а целиком индекс перечитывается
+    по истечении TTL, чтобы подхватить изменения из других воркеров.
+    Пока поиск не вызывался (PostgreSQL), обновления ничего не делают.
+    """
+
+    def __init__(self, ttl=INGREDIENT_INDEX_TTL):
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._index = InvertedIndex()
+        self._loaded_at = None
+
+    def _ensure_loaded(self):
+        if (
+            self._loaded_at is not None
+            and time.monotonic() - self._loaded_at < self.ttl
+        ):
+            return
+        index = InvertedIndex()
+        index.extend(Recipe.objects.all())
+        self._index = index
+        self._loaded_at = time.monotonic()
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = None
+
+    def refresh(self, recipe_id):
+        """Перечитывает название, описание и ингредиенты рецепта."""
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            self._index.discard(recipe_id)
+            self._index.extend(Recipe.objects.filter(pk=recipe_id))
+
+    def remove(self, recipe_id):
+        with self._lock:
+            self._index.discard(recipe_id)
+
+    def search(self, query):
+        with self._lock:
+            self._ensure_loaded()
+            return self._index.search(query)
+
+
+search_index = RecipeSearchIndex()
@@ -1,11 +1,15 @@
-from django.db import transaction
-from django.shortcuts import get_object_or_404
+from collections import defaultdict
+
+from django.db import models, transaction
+from django.db.models import prefetch_related_objects
 from rest_framework import serializers
 
 from foodgram_backend.constants import VALIDATOR_COUNT
 from shopping.models import Favorite, ShoppingCart
-from users.serializers import AuthorSerializer, Base64ImageField
+from users.serializers import AuthorSerializer
 
+from .catalog import catalog
+from .images import Base64ImageField, ThumbnailField
 from .models import Ingredient, Recipe, RecipeIngredient, Tag
 
 
@@ -26,34 +30,79 @@ class TagSerializer(serializers.ModelSerializer):
 
 
 class IngredientReadSerializer(serializers.ModelSerializer):
-    """Сериализатор для отображения ингредиентов."""
-    id = serializers.ReadOnlyField(source="ingredient.id")
-    name = serializers.CharField(source="ingredient.name", read_only=True)
-    measurement_unit = serializers.CharField(
-        source="ingredient.measurement_unit", read_only=True
-    )
+    """
+    Сериализатор для отображения ингредиентов; название и единица
+    измерения берутся из справочника в памяти, без соединения с
+    таблицей ингредиентов.
+    """
 
     class Meta:
         model = RecipeIngredient
         fields = ["id", "name", "measurement_unit", "amount"]
 
+    def to_representation(self, instance):
+        ingredient = catalog.ingredient(instance.ingredient_id)
+        return {
+            "id": ingredient.id,
+            "name": ingredient.name,
+            "measurement_unit": ingredient.measurement_unit,
+            "amount": instance.amount,
+        }
+
 
 class IngredientWriteSerializer(serializers.ModelSerializer):
     """Сериализатор для записи ингредиентов."""
-    id = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
+    id = serializers.IntegerField()
 
     class Meta:
         model = RecipeIngredient
         fields = ["id", "amount"]
 
 
+def prefetch_tag_ids(recipes):
+    """
+    Выставляет рецептам tag_ids одним запросом к промежуточной таблице
+    тегов; сами теги берутся из справочника.
+    """
+    pending = {}
+    for recipe in recipes:
+        if hasattr(recipe, "tag_ids"):
+            continue
+        prefetched = getattr(recipe, "_prefetched_objects_cache", {})
+        if "tags" in prefetched:
+            recipe.tag_ids = [tag.id for tag in prefetched["tags"]]
+        else:
+            pending[recipe.pk] = recipe
+    if not pending:
+        return
+    tag_ids = defaultdict(list)
+    for recipe_id, tag_id in Recipe.tags.through.objects.filter(
+        recipe_id__in=pending
+    ).order_by("id").values_list("recipe_id", "tag_id"):
+        tag_ids[recipe_id].append(tag_id)
+    for recipe_id, recipe in pending.items():
+        recipe.tag_ids = tag_ids[recipe_id]
+
+
+class RecipeListSerializer(serializers.ListSerializer):
+    """Список рецептов с загрузкой id тегов для всей страницы сразу."""
+
+    def to_representation(self, data):
+        recipes = list(
+            data.all() if isinstance(data, models.Manager) else data
+        )
+        prefetch_tag_ids(recipes)
+        return super().to_representation(recipes)
+
+
 class RecipeSerializer(serializers.ModelSerializer):
     """Сериализатор для рецептов."""
     image = Base64ImageField()
+    image_thumb = ThumbnailField("image", "image_thumbnail")
     ingredients = IngredientReadSerializer(
         many=True, source="recipe_ingredients", required=True
     )
-    tags = TagSerializer(many=True)
+    tags = serializers.SerializerMethodField()
     author = AuthorSerializer(read_only=True)
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
@@ -69,13 +118,37 @@ class RecipeSerializer(serializers.ModelSerializer):
             "is_favorited",
             "is_in_shopping_cart",
             "image",
+            "image_thumb",
             "name",
             "text",
             "cooking_time",
         ]
+        list_serializer_class = RecipeListSerializer
+
+    def to_representation(self, instance):
+        """
+        Добавляет фрагмент с подсветкой для результатов поиска и
+        оценку совпадения для подбора по ингредиентам.
+        """
+        data = super().to_representation(instance)
+        if hasattr(instance, "search_headline"):
+            data["search_headline"] = instance.search_headline
+        if hasattr(instance, "match_score"):
+            data["match_score"] = instance.match_score
+        return data
+
+    def get_tags(self, obj):
+        """Теги рецепта из справочника."""
+        prefetch_tag_ids([obj])
+        return [
+            {"id": tag.id, "name": tag.name, "slug": tag.slug}
+            for tag in map(catalog.tag, obj.tag_ids)
+        ]
 
     def get_is_favorited(self, obj):
         """Проверка наличия рецепта в избранном у пользователя."""
+        if hasattr(obj, "is_favorited"):
+            return obj.is_favorited
         user = self.context["request"].user
         if not user.is_authenticated:
             return False
@@ -83,6 +156,8 @@ class RecipeSerializer(serializers.ModelSerializer):
 
     def get_is_in_shopping_cart(self, obj):
         """Проверка наличия рецепта в списке покупок у пользователя"""
+        if hasattr(obj, "is_in_shopping_cart"):
+            return obj.is_in_shopping_cart
         user = self.context["request"].user
         if not user.is_authenticated:
             return False
@@ -95,9 +170,7 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
     ingredients = IngredientWriteSerializer(
         many=True, write_only=True, required=True
     )
-    tags = serializers.PrimaryKeyRelatedField(
-        queryset=Tag.objects.all(), many=True
-    )
+    tags = serializers.ListField(child=serializers.IntegerField())
 
     class Meta:
         model = Recipe
@@ -112,6 +185,7 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
 
     def to_representation(self, instance):
         """Репрезентация данных."""
+        prefetch_related_objects([instance], "recipe_ingredients")
         serializer = RecipeSerializer(instance, context=self.context)
         return serializer.data
 
@@ -128,6 +202,7 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
                     "Ингредиенты повторяются."
                 )
             repeat_ingredients.add(ingredient["id"])
+        self._check_exist(Ingredient, repeat_ingredients)
         return ingredients
 
     def validate_tags(self, tags):
@@ -138,29 +213,69 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
             )
         repeat_tags = set()
         for tag in tags:
-            if tag.id in repeat_tags:
+            if tag in repeat_tags:
                 raise serializers.ValidationError(
                     "Теги повторяются."
                 )
-            repeat_tags.add(tag.id)
+            repeat_tags.add(tag)
+        self._check_exist(Tag, repeat_tags)
         return tags
 
-    @transaction.atomic
+    def _check_exist(self, model, ids):
+        """Проверяем существование всех объектов по справочнику."""
+        missing = catalog.missing(model, ids)
+        if missing:
+            raise serializers.ValidationError(
+                "Объекты с id "
+                f"{', '.join(map(str, sorted(missing)))} не существуют."
+            )
+
     def _save_ingredients(self, recipe, ingredients):
         """Сохраняем ингредиенты для рецепта."""
         RecipeIngredient.objects.bulk_create(
             [
                 RecipeIngredient(
                     recipe=recipe,
-                    ingredient=get_object_or_404(
-                        Ingredient, id=ingredient["id"].id
-                    ),
+                    ingredient_id=ingredient["id"],
                     amount=ingredient["amount"],
                 )
                 for ingredient in ingredients
             ]
         )
 
+    def _update_ingredients(self, recipe, ingredients):
+        """
+        Применяем изменения ингредиентов как разницу: добавляем новые,
+        обновляем изменившиеся количества, удаляем убранные.
+        """
+        amounts = {
+            ingredient["id"]: ingredient["amount"]
+            for ingredient in ingredients
+        }
+        current = {
+            recipe_ingredient.ingredient_id: recipe_ingredient
+            for recipe_ingredient in recipe.recipe_ingredients.all()
+        }
+        removed = current.keys() - amounts.keys()
+        if removed:
+            recipe.recipe_ingredients.filter(
+                ingredient_id__in=removed
+            ).delete()
+        changed = []
+        for ingredient_id, recipe_ingredient in current.items():
+            amount = amounts.get(ingredient_id)
+            if amount is not None and recipe_ingredient.amount != amount:
+                recipe_ingredient.amount = amount
+                changed.append(recipe_ingredient)
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ["amount"])
+        added = [
+            ingredient for ingredient in ingredients
+            if ingredient["id"] not in current
+        ]
+        if added:
+            self._save_ingredients(recipe, added)
+
     @transaction.atomic
     def create(self, validated_data):
         """Создание рецепта."""
@@ -170,7 +285,6 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         validated_data["author"] = user
         recipe = Recipe.objects.create(**validated_data)
         recipe.tags.set(tags_data)
-        recipe.save()
         self._save_ingredients(recipe, ingredients)
         return recipe
 
@@ -183,8 +297,7 @@ class RecipeWriteSerializer(serializers.ModelSerializer):
         instance = super().update(instance, validated_data)
 
         if ingredients:
-            instance.recipe_ingredients.all().delete()
-            self._save_ingredients(instance, ingredients)
+            self._update_ingredients(instance, ingredients)
 
         if tags_data:
             instance.tags.set(tags_data)
@@ -0,0 +1,191 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+
+from users.models import UserProfile
+
+from .cache import INGREDIENTS, RECIPES, TAGS, bump_on_commit
+from .catalog import catalog
+from .detail_cache import (author_dependency, ingredient_dependency,
+                           invalidate, recipe_dependency, tag_dependency)
+from .images import schedule_thumbnail, thumbnail_created
+from .matching import match_index
+from .models import Ingredient, Recipe, RecipeIngredient, SimilarRecipe, Tag
+from .recommendations import mark_changed
+from .search import search_index, update_search_vectors
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredients(sender, **kwargs):
+    catalog.changed()
+    bump_on_commit(INGREDIENTS, RECIPES)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tags(sender, **kwargs):
+    catalog.changed()
+    bump_on_commit(TAGS, RECIPES)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(post_save, sender=UserProfile)
+def invalidate_recipes(sender, **kwargs):
+    bump_on_commit(RECIPES)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_author_recipes(sender, update_fields, **kwargs):
+    # Вход в систему меняет только last_login, которого нет в ответах.
+    if update_fields != {"last_login"}:
+        bump_on_commit(RECIPES)
+
+
+@receiver(post_save, sender=Recipe)
+def create_recipe_thumbnail(sender, instance, **kwargs):
+    schedule_thumbnail(instance, "image", "image_thumbnail")
+
+
+@receiver(post_save, sender=Recipe)
+def update_recipe_search_vector(sender, instance, **kwargs):
+    transaction.on_commit(lambda: update_search_vectors([instance.pk]))
+
+
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def update_ingredients_search_vector(sender, instance, **kwargs):
+    transaction.on_commit(
+        lambda: update_search_vectors([instance.recipe_id])
+    )
+
+
+@receiver(post_save, sender=Ingredient)
+def update_renamed_ingredient_search_vector(sender, instance, created,
+                                            **kwargs):
+    if not created:
+        transaction.on_commit(
+            lambda: update_search_vectors(
+                list(
+                    instance.ingredient_recipes.values_list(
+                        "recipe_id", flat=True
+                    )
+                )
+            )
+        )
+
+
+@receiver(post_save, sender=Recipe)
+def refresh_recipe_match_index(sender, instance, **kwargs):
+    transaction.on_commit(lambda: match_index.refresh(instance.pk))
+
+
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def refresh_ingredients_match_index(sender, instance, **kwargs):
+    transaction.on_commit(lambda: match_index.refresh(instance.recipe_id))
+
+
+@receiver(post_delete, sender=Recipe)
+def remove_recipe_from_match_index(sender, instance, **kwargs):
+    transaction.on_commit(lambda: match_index.remove(instance.pk))
+
+
+@receiver(post_save, sender=Recipe)
+def refresh_recipe_search_index(sender, instance, **kwargs):
+    transaction.on_commit(lambda: search_index.refresh(instance.pk))
+
+
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def refresh_ingredients_search_index(sender, instance, **kwargs):
+    transaction.on_commit(lambda: search_index.refresh(instance.recipe_id))
+
+
+@receiver(post_delete, sender=Recipe)
+def remove_recipe_from_search_index(sender, instance, **kwargs):
+    transaction.on_commit(lambda: search_index.remove(instance.pk))
+
+
+@receiver(post_save, sender=Ingredient)
+def invalidate_renamed_ingredient_search_index(sender, created, **kwargs):
+    if not created:
+        transaction.on_commit(search_index.invalidate)
+
+
+@receiver(pre_delete, sender=Recipe)
+def mark_similar_recipes_changed(sender, instance, **kwargs):
+    """Рецепты, у которых удаляемый был в похожих, нужно пересчитать."""
+    mark_changed(
+        SimilarRecipe.objects.filter(similar=instance).values_list(
+            "recipe_id", flat=True
+        )
+    )
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def invalidate_recipe_detail(sender, instance, **kwargs):
+    invalidate(recipe_dependency(instance.pk))
+
+
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def invalidate_recipe_ingredients_detail(sender, instance, **kwargs):
+    invalidate(recipe_dependency(instance.recipe_id))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_recipe_tags_detail(sender, instance, action, reverse, pk_set,
+                                  **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if not reverse:
+        recipe_ids = [instance.pk]
+    elif action == "pre_clear":
+        recipe_ids = instance.recipes.values_list("id", flat=True)
+    else:
+        recipe_ids = pk_set
+    invalidate(*map(recipe_dependency, recipe_ids))
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def invalidate_ingredient_detail(sender, instance, **kwargs):
+    invalidate(ingredient_dependency(instance.pk))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tag_detail(sender, instance, **kwargs):
+    invalidate(tag_dependency(instance.pk))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_author_detail(sender, instance, update_fields, **kwargs):
+    # Вход в систему меняет только last_login, которого нет в карточке.
+    if update_fields != {"last_login"}:
+        invalidate(author_dependency(instance.pk))
+
+
+@receiver(post_save, sender=UserProfile)
+def invalidate_author_profile_detail(sender, instance, **kwargs):
+    invalidate(author_dependency(instance.user_id))
+
+
+@receiver(thumbnail_created, sender=Recipe)
+def invalidate_recipe_thumbnail(sender, instance, **kwargs):
+    bump_on_commit(RECIPES)
+    invalidate(recipe_dependency(instance.pk))
+
+
+@receiver(thumbnail_created, sender=UserProfile)
+def invalidate_avatar_thumbnail(sender, instance, **kwargs):
+    bump_on_commit(RECIPES)
+    invalidate(author_dependency(instance.user_id))
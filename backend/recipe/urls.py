@@ -1,7 +1,9 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from shopping.views import FavoriteViewSet, ShoppingCartViewSet
+from shopping.views import (BulkFavoriteViewSet, BulkShoppingCartViewSet,
+                            FavoriteViewSet, ShoppingCartViewSet,
+                            ShoppingListViewSet)
 from users.views import CustomUserViewSet
 
 from .views import IngredientViewSet, RecipeViewSet, TagViewSet
@@ -11,6 +13,9 @@ router.register("tags", TagViewSet, basename="tag")
 router.register("ingredients", IngredientViewSet, basename="ingredient")
 router.register("recipes", RecipeViewSet, basename="recipe")
 router.register("users", CustomUserViewSet, basename="user")
+router.register(
+    "shopping_list", ShoppingListViewSet, basename="shopping-list"
+)
 
 
 urlpatterns = [
@@ -20,6 +25,18 @@ urlpatterns = [
         CustomUserViewSet.as_view({"post": "create"}),
         name="signup",
     ),
+    path(
+        "recipes/shopping_cart/",
+        BulkShoppingCartViewSet.as_view(
+            {"post": "create", "delete": "destroy"}
+        ),
+        name="recipe-shopping-cart-bulk",
+    ),
+    path(
+        "recipes/favorite/",
+        BulkFavoriteViewSet.as_view({"post": "create", "delete": "destroy"}),
+        name="recipe-favorite-bulk",
+    ),
     path(
         "recipes/<int:recipe_id>/shopping_cart/",
         ShoppingCartViewSet.as_view({"post": "create", "delete": "destroy"}),
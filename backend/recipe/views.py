@@ -1,20 +1,38 @@
+from itertools import chain
+
 from django.conf import settings
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.contrib.auth.models import AnonymousUser
+from django.db.models import BooleanField, Exists, OuterRef, Prefetch, Value
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.filters import OrderingFilter, SearchFilter
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.viewsets import GenericViewSet
 
-from shopping.models import ShoppingCart
+from foodgram_backend.constants import (INGREDIENT_SEARCH_LIMIT,
+                                        MATCH_RESULTS_LIMIT, MATCH_RESULTS_MAX,
+                                        PAGINTAION_NUMBER, RECIPES_LIMIT_MAX,
+                                        SIMILAR_RECIPES_TOP_K)
+from shopping.models import Favorite, ShoppingCart
+from users.feed import feed_page
 
-from .filters import RecipeFilter
-from .models import Ingredient, Recipe, RecipeIngredient, Tag
+from .cache import INGREDIENTS, RECIPES, TAGS, cached_response
+from .detail_cache import cached_payload, with_user_flags
+from .exports import SHOPPING_LIST_EXPORTS, shopping_list_rows
+from .fast_serializers import author_queryset, recipe_rows, serialize_recipes
+from .filters import IngredientFilter, RecipeFilter
+from .matching import COVERAGE, JACCARD, match_index
+from .models import Ingredient, Recipe, Tag
+from .paginations import RecipeCursorPagination, use_cursor_pagination
 from .permissions import Anonymous, Author
+from .recommendations import recommended_ids, similar_ids
+from .search import ingredient_index
 from .serializers import (IngredientSerializer, RecipeSerializer,
                           RecipeWriteSerializer, TagSerializer)
 
@@ -27,12 +45,26 @@ class BaseViewSet(
     """Базовый вьюсет для наследования."""
     permission_classes = [AllowAny]
     filter_backends = [SearchFilter, OrderingFilter, DjangoFilterBackend]
-    filter_fileds = ["name"]
+    filterset_fields = ["name"]
     ordering_fields = ["name"]
+    cache_namespace = None
+    replica_reads = True
+
+    @cached_response()
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
+    @cached_response()
     def list(self, request, *args, **kwargs):
         """Переопределение метода get."""
-        queryset = self.get_queryset()
+        queryset = self.filter_queryset(self.get_queryset())
+        if settings.FAST_SERIALIZERS:
+            # Поля сериализаторов тегов и ингредиентов — столбцы модели.
+            return Response(
+                list(
+                    queryset.values(*self.get_serializer_class().Meta.fields)
+                )
+            )
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
@@ -41,12 +73,25 @@ class TagViewSet(BaseViewSet):
     """ViewSet тегов."""
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
+    cache_namespace = TAGS
 
 
 class IngredientViewSet(BaseViewSet):
     """ViewSet ингредиентов."""
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
+    cache_namespace = INGREDIENTS
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = IngredientFilter
+
+    def list(self, request, *args, **kwargs):
+        """Поиск по индексу в памяти процесса, если он включен."""
+        name = request.query_params.get("name")
+        if name and settings.INGREDIENT_PREFIX_INDEX:
+            return Response(
+                ingredient_index.search(name, INGREDIENT_SEARCH_LIMIT)
+            )
+        return super().list(request, *args, **kwargs)
 
 
 class RecipeViewSet(viewsets.ModelViewSet):
@@ -54,10 +99,56 @@ class RecipeViewSet(viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
+    cache_namespace = RECIPES
+    replica_reads = True
+
+    @property
+    def paginator(self):
+        """Пагинация по ключу, если клиент передал параметр cursor."""
+        if (
+            not hasattr(self, "_paginator")
+            and use_cursor_pagination(self.request)
+        ):
+            self._paginator = RecipeCursorPagination()
+        return super().paginator
+
+    def get_queryset(self):
+        """
+        Рецепты с аннотированными флагами текущего пользователя и
+        подгруженными автором и ингредиентами; названия ингредиентов и
+        теги сериализатор берёт из справочника recipe.catalog.
+        """
+        return self.recipes_for(self.request.user)
+
+    def recipes_for(self, user):
+        """Queryset из get_queryset с флагами пользователя user."""
+        if user.is_authenticated:
+            queryset = Recipe.objects.annotate(
+                is_favorited=Exists(
+                    Favorite.objects.filter(user=user, recipe=OuterRef("pk"))
+                ),
+                is_in_shopping_cart=Exists(
+                    ShoppingCart.objects.filter(
+                        user=user, recipe=OuterRef("pk")
+                    )
+                ),
+            )
+        else:
+            queryset = Recipe.objects.annotate(
+                is_favorited=Value(False, output_field=BooleanField()),
+                is_in_shopping_cart=Value(False, output_field=BooleanField()),
+            )
+        return queryset.defer("search_vector").prefetch_related(
+            Prefetch("author", queryset=author_queryset(user)),
+            "recipe_ingredients",
+        )
 
     def get_permissions(self):
         """Получение разрешения в зависимости от типа запроса."""
-        if self.request.method in ["POST"]:
+        if (
+            self.action in ["feed", "recommended"]
+            or self.request.method in ["POST"]
+        ):
             permission_classes = [IsAuthenticated]
         elif self.request.method in ["PUT", "PATCH", "DELETE"]:
             permission_classes = [Author]
@@ -65,6 +156,55 @@ class RecipeViewSet(viewsets.ModelViewSet):
             permission_classes = [Anonymous]
         return [permission() for permission in permission_classes]
 
+    @cached_response(anonymous_only=True)
+    def list(self, request, *args, **kwargs):
+        """
+        При FAST_SERIALIZERS страница выбирается через values() и
+        сериализуется recipe.fast_serializers с тем же JSON.
+        """
+        if not settings.FAST_SERIALIZERS:
+            return super().list(request, *args, **kwargs)
+        queryset = recipe_rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(serialize_recipes(queryset, request))
+        return self.get_paginated_response(serialize_recipes(page, request))
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        При RECIPE_DETAIL_CACHE карточка без данных пользователя берётся
+        из recipe.detail_cache, флаги пользователя — одним запросом.
+        """
+        if not settings.RECIPE_DETAIL_CACHE or request.query_params:
+            # Фильтры RecipeFilter применяются и к карточке.
+            return super().retrieve(request, *args, **kwargs)
+        try:
+            pk = int(kwargs[self.lookup_url_kwarg or self.lookup_field])
+        except ValueError:
+            raise Http404
+        data = cached_payload(
+            pk,
+            request.build_absolute_uri("/"),
+            lambda: self.anonymous_payload(pk),
+        )
+        if data is not None and request.user.is_authenticated:
+            data = with_user_flags(data, request.user)
+        if data is None:
+            raise Http404
+        return Response(data)
+
+    def anonymous_payload(self, pk):
+        """Карточка рецепта pk в том виде, в каком её видит аноним."""
+        anonymous = AnonymousUser()
+        queryset = self.recipes_for(anonymous).filter(pk=pk)
+        if settings.FAST_SERIALIZERS:
+            results = serialize_recipes(
+                recipe_rows(queryset), self.request, anonymous
+            )
+            return results[0] if results else None
+        recipe = queryset.first()
+        return self.get_serializer(recipe).data if recipe else None
+
     def get_serializer_class(self):
         """Возвращаем разные сериализаторы для чтения и записи."""
         if self.action in ["create", "update", "partial_update"]:
@@ -83,6 +223,126 @@ class RecipeViewSet(viewsets.ModelViewSet):
             status=status.HTTP_204_NO_CONTENT
         )
 
+    @action(detail=False, methods=["get"], url_path="match")
+    def match(self, request):
+        """
+        Рецепты, которые можно приготовить из переданных ингредиентов,
+        по убыванию доли имеющихся ингредиентов (score=coverage) или
+        меры Жаккара (score=jaccard).
+        """
+        try:
+            ingredient_ids = {
+                int(value)
+                for param in request.query_params.getlist("ingredients")
+                for value in param.split(",") if value
+            }
+            limit = int(
+                request.query_params.get("limit", MATCH_RESULTS_LIMIT)
+            )
+        except ValueError:
+            raise ValidationError(
+                "Параметры ingredients и limit должны быть числами."
+            )
+        score = request.query_params.get("score", COVERAGE)
+        if score not in (COVERAGE, JACCARD):
+            raise ValidationError(
+                {"score": f"Допустимые значения: {COVERAGE}, {JACCARD}."}
+            )
+        if not ingredient_ids:
+            raise ValidationError(
+                {"ingredients": "Передайте хотя бы один ингредиент."}
+            )
+
+        matches = match_index.search(
+            ingredient_ids,
+            max(1, min(limit, MATCH_RESULTS_MAX)),
+            score,
+        )
+        return Response(
+            self.serialize_in_order(
+                [recipe_id for recipe_id, _ in matches],
+                {recipe_id: round(value, 4) for recipe_id, value in matches},
+            )
+        )
+
+    def get_limit(self, maximum):
+        try:
+            limit = int(
+                self.request.query_params.get("limit", PAGINTAION_NUMBER)
+            )
+        except ValueError:
+            raise ValidationError({"limit": "Параметр должен быть числом."})
+        return max(1, min(limit, maximum))
+
+    def serialize_in_order(self, ids, match_scores=None):
+        """
+        Рецепты из get_queryset в порядке ids; match_scores — оценки
+        подбора по ингредиентам.
+        """
+        queryset = self.get_queryset().filter(pk__in=ids)
+        if not settings.FAST_SERIALIZERS:
+            recipes = queryset.in_bulk()
+            results = [recipes[pk] for pk in ids if pk in recipes]
+            for recipe in results if match_scores else ():
+                recipe.match_score = match_scores[recipe.id]
+            return self.get_serializer(results, many=True).data
+        rows = {row["id"]: row for row in recipe_rows(queryset)}
+        results = [rows[pk] for pk in ids if pk in rows]
+        for row in results if match_scores else ():
+            row["match_score"] = match_scores[row["id"]]
+        return serialize_recipes(results, self.request)
+
+    @action(detail=False, methods=["get"], url_path="feed")
+    def feed(self, request):
+        """
+        Рецепты авторов из подписок, новые первыми. Следующая страница
+        запрашивается параметром before из ссылки next.
+        """
+        try:
+            limit = int(
+                request.query_params.get("limit", PAGINTAION_NUMBER)
+            )
+            before = request.query_params.get("before")
+            before = int(before) if before else None
+        except ValueError:
+            raise ValidationError(
+                "Параметры limit и before должны быть числами."
+            )
+        ids, has_next = feed_page(
+            request.user, max(1, min(limit, RECIPES_LIMIT_MAX)), before
+        )
+        return Response(
+            {
+                "next": replace_query_param(
+                    request.build_absolute_uri(), "before", ids[-1]
+                ) if has_next else None,
+                "previous": None,
+                "results": self.serialize_in_order(ids),
+            }
+        )
+
+    @action(detail=True, methods=["get"], url_path="similar")
+    def similar(self, request, pk=None):
+        """
+        Похожие рецепты: их чаще всего добавляют в избранное вместе с
+        этим. Берутся из таблицы build_recommendations.
+        """
+        ids = similar_ids(pk, self.get_limit(SIMILAR_RECIPES_TOP_K))
+        if not ids and not Recipe.objects.filter(pk=pk).exists():
+            raise Http404
+        return Response(self.serialize_in_order(ids))
+
+    @action(detail=False, methods=["get"], url_path="recommended")
+    def recommended(self, request):
+        """Рекомендации по последним рецептам из избранного."""
+        return Response(
+            self.serialize_in_order(
+                recommended_ids(
+                    request.user, self.get_limit(RECIPES_LIMIT_MAX)
+                )
+            )
+        )
+
     @action(detail=True, methods=["get"], url_path="get-link")
     def get_link(self, request, pk=None):
         """Получение ссылки на рецепт."""
@@ -96,37 +356,36 @@ class RecipeViewSet(viewsets.ModelViewSet):
         detail=False, methods=["get"], url_path="download_shopping_cart"
     )
     def download_shopping_cart(self, request):
-        """Скачать список покупок в формате TXT."""
-
-        shopping_cart = ShoppingCart.objects.filter(user=request.user)
+        """Скачать список покупок в формате TXT, CSV или JSON."""
+        export = SHOPPING_LIST_EXPORTS.get(
+            request.query_params.get("type", "txt")
+        )
+        if export is None:
+            supported = ", ".join(SHOPPING_LIST_EXPORTS)
+            return Response(
+                {
+                    "detail": (
+                        "Неподдерживаемый формат списка покупок. "
+                        f"Допустимые значения type: {supported}."
+                    ),
+                    "supported_types": list(SHOPPING_LIST_EXPORTS),
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        if not shopping_cart.exists():
+        rows = shopping_list_rows(request.user)
+        first = next(rows, None)
+        if first is None:
             return Response(
                 {"detail": "Список покупок пуст."},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        ingredient_totals = (
-            RecipeIngredient.objects.filter(
-                recipe__shoppingcart__user=request.user
-            ).values(
-                "ingredient__name", "ingredient__measurement_unit"
-            ).annotate(total_amount=Sum("amount"))
+        response = StreamingHttpResponse(
+            export.render(chain([first], rows)),
+            content_type=export.content_type,
         )
-
-        shopping_list = ["Список покупок:\n"]
-        for item in ingredient_totals:
-            shopping_list.append(
-                f"- {item['ingredient__name']}: "
-                f"{item['total_amount']} "
-                f"{item['ingredient__measurement_unit']}"
-            )
-
-        response = HttpResponse(
-            "".join(shopping_list), content_type="text/plain"
+        response["Content-Disposition"] = (
+            f'attachment; filename="shopping_list.{export.extension}"'
         )
-        response[
-            "Content-Disposition"
-        ] = 'attachment; filename="shopping_list.txt"'
-
         return response
@@ -0,0 +1,136 @@
+from django.db import connection
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Greatest
+
+from foodgram_backend.constants import SHOPPING_LIST_BATCH_SIZE
+from recipe.models import RecipeIngredient
+
+from .models import ShoppingCart, ShoppingListItem
+
+ADD_RECIPES_SQL = """
+    INSERT INTO {items} (user_id, ingredient_id, total_amount)
+    SELECT %s, ingredient_id, SUM(amount) FROM {recipe_ingredients}
+    WHERE recipe_id IN ({recipes})
+    GROUP BY ingredient_id
+    ON CONFLICT (user_id, ingredient_id) DO UPDATE
+    SET total_amount = {items}.total_amount + excluded.total_amount
+"""
+
+
+def add_recipes(user_id, recipe_ids):
+    """
+    Добавляет ингредиенты рецептов в список покупок одним запросом
+    INSERT ... ON CONFLICT, поэтому параллельные добавления рецептов
+    с общими ингредиентами не теряют количества.
+    """
+    recipe_ids = list(recipe_ids)
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            ADD_RECIPES_SQL.format(
+                items=quote(ShoppingListItem._meta.db_table),
+                recipe_ingredients=quote(RecipeIngredient._meta.db_table),
+                recipes=", ".join(["%s"] * len(recipe_ids)),
+            ),
+            [user_id, *recipe_ids],
+        )
+
+
+def remove_recipes(user_id, recipe_ids):
+    """Вычитает ингредиенты рецептов из списка покупок."""
+    recipe_ingredients = RecipeIngredient.objects.filter(
+        recipe_id__in=recipe_ids
+    )
+    ShoppingListItem.objects.filter(
+        user_id=user_id,
+        ingredient_id__in=recipe_ingredients.values("ingredient_id"),
+    ).update(
+        total_amount=Greatest(
+            F("total_amount") - Subquery(
+                recipe_ingredients.filter(
+                    ingredient_id=OuterRef("ingredient_id")
+                )
+                .values("ingredient_id")
+                .annotate(total=Sum("amount"))
+                .values("total")
+            ),
+            Value(0),
+        )
+    )
+    ShoppingListItem.objects.filter(user_id=user_id, total_amount=0).delete()
+
+
+def expected_totals(**filters):
+    """Количества по (пользователь, ингредиент), посчитанные по корзинам."""
+    return {
+        (row["recipe__shoppingcart__user"], row["ingredient"]): row["total"]
+        for row in RecipeIngredient.objects.filter(**filters)
+        .values("recipe__shoppingcart__user", "ingredient")
+        .annotate(total=Sum("amount"))
+        .order_by()
+    }
+
+
+def diff_items(items, totals):
+    """Расхождения позиций с ожидаемыми количествами."""
+    current = {(item.user_id, item.ingredient_id): item for item in items}
+    stale = [
+        item.pk for key, item in current.items() if key not in totals
+    ]
+    changed = []
+    added = []
+    for (user_id, ingredient_id), total in totals.items():
+        item = current.get((user_id, ingredient_id))
+        if item is None:
+            added.append(
+                ShoppingListItem(
+                    user_id=user_id,
+                    ingredient_id=ingredient_id,
+                    total_amount=total,
+                )
+            )
+        elif item.total_amount != total:
+            item.total_amount = total
+            changed.append(item)
+    return stale, changed, added
+
+
+def apply_diff(stale, changed, added):
+    if stale:
+        ShoppingListItem.objects.filter(pk__in=stale).delete()
+    if changed:
+        ShoppingListItem.objects.bulk_update(changed, ["total_amount"])
+    if added:
+        ShoppingListItem.objects.bulk_create(added, ignore_conflicts=True)
+
+
+def batches(values):
+    values = list(values)
+    for start in range(0, len(values), SHOPPING_LIST_BATCH_SIZE):
+        yield values[start:start + SHOPPING_LIST_BATCH_SIZE]
+
+
+def refresh_recipe(recipe_id, ingredient_ids=None):
+    """
+    Пересчитывает позиции ингредиентов рецепта у всех, у кого он в
+    корзине. Пересчёт идемпотентен, поэтому повторный вызов и порядок
+    каскадного удаления на результат не влияют.
+    """
+    if ingredient_ids is None:
+        ingredient_ids = list(
+            RecipeIngredient.objects.filter(recipe_id=recipe_id)
+            .values_list("ingredient_id", flat=True)
+        )
+    users = ShoppingCart.objects.filter(recipe_id=recipe_id).values_list(
+        "user_id", flat=True
+    )
+    for user_ids in batches(users):
+        apply_diff(*diff_items(
+            ShoppingListItem.objects.filter(
+                user_id__in=user_ids, ingredient_id__in=ingredient_ids
+            ),
+            expected_totals(
+                recipe__shoppingcart__user__in=user_ids,
+                ingredient_id__in=ingredient_ids,
+            ),
+        ))
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ShoppingConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "shopping"
+
+    def ready(self):
+        import shopping.signals  # noqa: F401
@@ -2,7 +2,7 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import models
 
-from recipe.models import Recipe
+from recipe.models import Ingredient, Recipe
 
 User = get_user_model()
 
@@ -34,6 +34,11 @@ class Favorite(models.Model):
                 name="unique_favorite"
             )
         ]
+        indexes = [
+            models.Index(
+                fields=["recipe", "user"], name="favorite_recipe_user_idx"
+            ),
+        ]
 
         def __str__(self):
             return (f"{self.user.username} добавил"
@@ -60,3 +65,41 @@ class ShoppingCart(models.Model):
                 name="unique_shopping_cart"
             )
         ]
+        indexes = [
+            models.Index(
+                fields=["recipe", "user"], name="cart_recipe_user_idx"
+            ),
+        ]
+
+
+class ShoppingListItem(models.Model):
+    """
+    Итоговое количество ингредиента в списке покупок пользователя.
+    Поддерживается при изменении корзины и ингредиентов рецептов.
+    """
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="shopping_list",
+        verbose_name="Пользователь",
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name="shopping_list_items",
+        verbose_name="Ингредиент",
+    )
+    total_amount = models.PositiveIntegerField(verbose_name="Количество")
+
+    class Meta:
+        verbose_name = "Позиция списка покупок"
+        verbose_name_plural = "Список покупок"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "ingredient"],
+                name="unique_shopping_list_item"
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.ingredient}: {self.total_amount}"
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 
-from .models import Favorite, ShoppingCart
+from foodgram_backend.constants import BULK_RECIPES_MAX
+
+from .models import Favorite, ShoppingCart, ShoppingListItem
 
 
 class FavoriteSerializer(serializers.ModelSerializer):
@@ -15,3 +17,26 @@ class ShoppingCartSerializer(serializers.ModelSerializer):
     class Meta:
         model = ShoppingCart
         fields = ["id", "name", "image", "cooking_time"]
+
+
+class ShoppingListItemSerializer(serializers.ModelSerializer):
+    """Сериализатор позиции списка покупок."""
+    id = serializers.ReadOnlyField(source="ingredient.id")
+    name = serializers.ReadOnlyField(source="ingredient.name")
+    measurement_unit = serializers.ReadOnlyField(
+        source="ingredient.measurement_unit"
+    )
+    amount = serializers.ReadOnlyField(source="total_amount")
+
+    class Meta:
+        model = ShoppingListItem
+        fields = ["id", "name", "measurement_unit", "amount"]
+
+
+class BulkRecipesSerializer(serializers.Serializer):
+    """Список id рецептов для массовых операций."""
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=BULK_RECIPES_MAX,
+    )
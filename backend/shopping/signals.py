@@ -0,0 +1,57 @@
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from recipe.models import Recipe, RecipeIngredient
+from recipe.recommendations import mark_changed
+
+from .aggregates import add_recipes, refresh_recipe, remove_recipes
+from .models import Favorite, ShoppingCart
+
+
+@receiver(post_save, sender=Favorite)
+def increment_favorites_count(sender, instance, created, **kwargs):
+    if created:
+        Recipe.objects.filter(pk=instance.recipe_id).update(
+            favorites_count=F("favorites_count") + 1
+        )
+
+
+@receiver(post_delete, sender=Favorite)
+def decrement_favorites_count(sender, instance, **kwargs):
+    Recipe.objects.filter(
+        pk=instance.recipe_id, favorites_count__gt=0
+    ).update(favorites_count=F("favorites_count") - 1)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+def mark_recommendations_changed(sender, instance, **kwargs):
+    if kwargs.get("created", True):
+        mark_changed([instance.recipe_id])
+
+
+@receiver(post_save, sender=ShoppingCart)
+def add_to_shopping_list(sender, instance, created, **kwargs):
+    if created:
+        add_recipes(instance.user_id, [instance.recipe_id])
+
+
+@receiver(pre_delete, sender=ShoppingCart)
+def remove_from_shopping_list(sender, instance, **kwargs):
+    remove_recipes(instance.user_id, [instance.recipe_id])
+
+
+@receiver(post_save, sender=Recipe)
+def refresh_recipe_shopping_lists(sender, instance, created, **kwargs):
+    if not created:
+        transaction.on_commit(lambda: refresh_recipe(instance.pk))
+
+
+@receiver(post_save, sender=RecipeIngredient)
+@receiver(post_delete, sender=RecipeIngredient)
+def refresh_ingredient_shopping_lists(sender, instance, **kwargs):
+    transaction.on_commit(
+        lambda: refresh_recipe(instance.recipe_id, [instance.ingredient_id])
+    )
@@ -1,13 +1,18 @@
+from django.db import transaction
+from django.db.models import F
 from django.shortcuts import get_object_or_404
-from rest_framework import status, viewsets
+from rest_framework import mixins, status, viewsets
 from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
 from recipe.models import Recipe
+from recipe.recommendations import mark_changed
 from users.serializers import RecipeShortSerializer
 
+from .aggregates import add_recipes, remove_recipes
 from .models import Favorite, ShoppingCart
+from .serializers import BulkRecipesSerializer, ShoppingListItemSerializer
 
 
 class ShoppingCartViewSet(viewsets.ModelViewSet):
@@ -80,3 +85,135 @@ class FavoriteViewSet(viewsets.ModelViewSet):
             {"detail": "Рецепт удален из избранного."},
             status=status.HTTP_204_NO_CONTENT,
         )
+
+
+class ShoppingListViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """Текущий список покупок пользователя."""
+    permission_classes = [IsAuthenticated]
+    serializer_class = ShoppingListItemSerializer
+    pagination_class = None
+
+    def get_queryset(self):
+        return self.request.user.shopping_list.select_related(
+            "ingredient"
+        ).order_by("ingredient__name", "ingredient__measurement_unit")
+
+
+class BulkUserRecipeViewSet(viewsets.GenericViewSet):
+    """
+    Массовое добавление и удаление рецептов пользователя. Вставка и
+    удаление идут одним запросом без сигналов моделей, поэтому
+    наследники обновляют зависимые данные в added и removed.
+    """
+    permission_classes = [IsAuthenticated]
+    model = None
+
+    def get_recipes(self, request):
+        serializer = BulkRecipesSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = set(serializer.validated_data["recipes"])
+        recipes = Recipe.objects.in_bulk(ids)
+        missing = ids - recipes.keys()
+        if missing:
+            raise ValidationError(
+                {
+                    "recipes": [
+                        "Рецепты с id "
+                        f"{', '.join(map(str, sorted(missing)))} "
+                        "не существуют."
+                    ]
+                }
+            )
+        return recipes
+
+    def recipes_response(self, recipes, ids, status_code):
+        serializer = RecipeShortSerializer(
+            [recipes[recipe_id] for recipe_id in sorted(ids)],
+            many=True,
+            context={"request": self.request},
+        )
+        return Response(serializer.data, status=status_code)
+
+    @transaction.atomic
+    def create(self, request):
+        """
+        Добавить рецепты; в ответе только добавленные. Строка
+        пользователя блокируется до конца транзакции, поэтому
+        параллельные массовые добавления того же пользователя не
+        посчитают один рецепт дважды.
+        """
+        recipes = self.get_recipes(request)
+        user = request.user
+        type(user).objects.select_for_update().filter(pk=user.pk).exists()
+        added = recipes.keys() - set(
+            self.model.objects.filter(
+                user=user, recipe_id__in=recipes
+            ).values_list("recipe_id", flat=True)
+        )
+        if added:
+            self.model.objects.bulk_create(
+                [
+                    self.model(user=user, recipe_id=recipe_id)
+                    for recipe_id in added
+                ],
+                ignore_conflicts=True,
+            )
+            self.added(user, added)
+        return self.recipes_response(recipes, added, status.HTTP_201_CREATED)
+
+    @transaction.atomic
+    def destroy(self, request):
+        """Удалить рецепты; в ответе только удалённые."""
+        recipes = self.get_recipes(request)
+        relations = self.model.objects.filter(
+            user=request.user, recipe_id__in=recipes
+        )
+        removed = set(
+            relations.select_for_update().values_list("recipe_id", flat=True)
+        )
+        if removed:
+            self.removed(request.user, removed)
+            # Один DELETE без выборки объектов и рассылки сигналов:
+            # на эти таблицы никто не ссылается, каскадов нет.
+            relations._raw_delete(relations.db)
+        return self.recipes_response(recipes, removed, status.HTTP_200_OK)
+
+    def added(self, user, recipe_ids):
+        """
+        Вызывается в транзакции после вставки с id добавленных рецептов
+        вместо сигнала post_save, который bulk_create не рассылает.
+        """
+
+    def removed(self, user, recipe_ids):
+        """
+        Вызывается в транзакции перед удалением с id удаляемых рецептов
+        вместо сигналов удаления.
+        """
+
+
+class BulkShoppingCartViewSet(BulkUserRecipeViewSet):
+    """Массовые операции со списком покупок."""
+    model = ShoppingCart
+
+    def added(self, user, recipe_ids):
+        add_recipes(user.id, recipe_ids)
+
+    def removed(self, user, recipe_ids):
+        remove_recipes(user.id, recipe_ids)
+
+
+class BulkFavoriteViewSet(BulkUserRecipeViewSet):
+    """Массовые операции с избранным."""
+    model = Favorite
+
+    def added(self, user, recipe_ids):
+        Recipe.objects.filter(id__in=recipe_ids).update(
+            favorites_count=F("favorites_count") + 1
+        )
+        mark_changed(recipe_ids)
+
+    def removed(self, user, recipe_ids):
+        Recipe.objects.filter(
+            id__in=recipe_ids, favorites_count__gt=0
+        ).update(favorites_count=F("favorites_count") - 1)
+        mark_changed(recipe_ids)
@@ -0,0 +1,126 @@
+import pytest
+from django.core.cache import cache
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipe.catalog import catalog
+from recipe.models import Ingredient, Recipe, RecipeIngredient, Tag
+from recipe.search import search_index
+from shopping.models import Favorite, ShoppingCart
+from users.models import Subscription, User
+
+RECIPES_COUNT = 12
+
+
+@pytest.fixture(autouse=True)
+def isolated_state(settings, tmp_path):
+    """
+    Тесты не делят между собой кэш, справочник и файлы: данные каждого
+    теста откатываются, а on_commit-обработчики не выполняются.
+    """
+    settings.MEDIA_ROOT = str(tmp_path)
+    settings.ALLOWED_HOSTS = ["testserver"]
+    settings.CATALOG_POLL_SECONDS = 0
+    settings.IMAGE_PROCESS_WORKERS = 0
+    cache.clear()
+    catalog.invalidate()
+    search_index.invalidate()
+    yield
+    cache.clear()
+    catalog.invalidate()
+    search_index.invalidate()
+
+
+def make_user(username):
+    return User.objects.create_user(
+        username=username,
+        email=f"{username}@example.com",
+        password="password",
+        first_name=username,
+        last_name=username,
+    )
+
+
+@pytest.fixture
+def author(db):
+    return make_user("author")
+
+
+@pytest.fixture
+def reader(db):
+    return make_user("reader")
+
+
+@pytest.fixture
+def tags(db):
+    return [
+        Tag.objects.create(name=f"Тег {number}", slug=f"tag-{number}")
+        for number in range(3)
+    ]
+
+
+@pytest.fixture
+def ingredients(db):
+    return [
+        Ingredient.objects.create(
+            name=f"Ингредиент {number}", measurement_unit="г"
+        )
+        for number in range(6)
+    ]
+
+
+@pytest.fixture
+def recipes(author, reader, tags, ingredients):
+    """
+    Рецепты двух авторов с тегами и ингредиентами; часть из них у
+    reader в избранном и списке покупок, reader подписан на author.
+    """
+    other = make_user("other")
+    recipes = []
+    for number in range(RECIPES_COUNT):
+        recipe = Recipe.objects.create(
+            author=author if number % 2 else other,
+            name=f"Рецепт {number}",
+            image=f"recipes/{number}.png",
+            text="Описание",
+            cooking_time=number + 1,
+        )
+        recipe.tags.set([tags[0], tags[number % 3]])
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=recipe,
+                ingredient=ingredients[(number + shift) % len(ingredients)],
+                amount=shift + 1,
+            )
+            for shift in range(3)
+        )
+        recipes.append(recipe)
+    for recipe in recipes[::3]:
+        Favorite.objects.create(user=reader, recipe=recipe)
+        ShoppingCart.objects.create(user=reader, recipe=recipe)
+    Subscription.objects.create(user=reader, author=author)
+    return recipes
+
+
+@pytest.fixture
+def anonymous_client():
+    return APIClient()
+
+
+def token_client(user):
+    """Клиент с токеном, как у фронтенда: токен ищется в базе."""
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=user).key}"
+    )
+    return client
+
+
+@pytest.fixture
+def reader_client(reader):
+    return token_client(reader)
+
+
+@pytest.fixture
+def author_client(author):
+    return token_client(author)
@@ -0,0 +1,71 @@
+import io
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from recipe.management.commands.benchmark import (SCENARIO, prepare_contexts,
+                                                  run_scenario, summarize)
+
+pytestmark = [pytest.mark.benchmark, pytest.mark.django_db(transaction=True)]
+
+ITERATIONS = 30
+# Тестовая база SQLite в памяти не допускает параллельной записи.
+CONCURRENCY = 2 if connection.vendor == "postgresql" else 1
+# Бюджеты задержки в миллисекундах (p50, p95) на наборе seed_benchmark
+# --scale 0.001 (100 пользователей, 1000 рецептов): запросы идут в
+# процессе через тестовый клиент, кэш ответов включён. Замеры на
+# PostgreSQL в два потока примерно втрое ниже бюджетов. Зависят от
+# машины, поэтому тест запускается вручную, а не в CI.
+BUDGETS = {
+    "tags": (20, 50),
+    "tag": (20, 50),
+    "ingredients search": (20, 50),
+    "ingredient": (20, 50),
+    "recipes anonymous": (20, 50),
+    "recipes": (75, 150),
+    "recipes filtered": (100, 200),
+    "recipes search": (20, 50),
+    "recipe": (60, 120),
+    "recipe link": (20, 50),
+    "recipes match": (50, 100),
+    "favorite add": (60, 150),
+    "favorite remove": (60, 150),
+    "cart add": (60, 150),
+    "shopping list": (30, 75),
+    "cart remove": (60, 150),
+    "users": (20, 50),
+    "user": (40, 90),
+    "me": (35, 75),
+    "subscribe": (125, 250),
+    "subscriptions": (200, 350),
+    "unsubscribe": (60, 150),
+}
+
+
+@pytest.fixture
+def seeded(settings):
+    # Как в продакшене с Redis.
+    settings.RESPONSE_CACHE = True
+    settings.RECIPE_DETAIL_CACHE = True
+    call_command("seed_benchmark", scale=0.001, stdout=io.StringIO())
+
+
+def test_routes_within_budget(seeded):
+    results, _ = run_scenario(
+        SCENARIO, prepare_contexts(CONCURRENCY), ITERATIONS
+    )
+    routes = summarize(SCENARIO, results)
+    over_budget = []
+    for name, *_ in SCENARIO:
+        route = routes[name]
+        assert all(status < 400 for status in route["statuses"]), (
+            name, route["statuses"]
+        )
+        p50, p95 = BUDGETS[name]
+        if route["p50"] > p50 or route["p95"] > p95:
+            over_budget.append(
+                f"{name}: p50 {route['p50']} (бюджет {p50}), "
+                f"p95 {route['p95']} (бюджет {p95})"
+            )
+    assert not over_budget, "\n".join(over_budget)
@@ -0,0 +1,99 @@
+import pytest
+from django.db import connection
+from django.db.models import Count, Sum
+from django.test.utils import CaptureQueriesContext
+
+from recipe.models import Recipe, RecipeIngredient
+from shopping.models import Favorite, ShoppingCart
+
+FAVORITE_URL = "/api/recipes/favorite/"
+CART_URL = "/api/recipes/shopping_cart/"
+
+
+def ids(response):
+    return sorted(recipe["id"] for recipe in response.json())
+
+
+def assert_favorites_counts():
+    counts = dict(
+        Favorite.objects.values("recipe").annotate(total=Count("pk"))
+        .values_list("recipe", "total")
+    )
+    for recipe_id, favorites_count in Recipe.objects.values_list(
+        "id", "favorites_count"
+    ):
+        assert favorites_count == counts.get(recipe_id, 0)
+
+
+def assert_shopping_list(user):
+    expected = {
+        row["ingredient"]: row["total"]
+        for row in RecipeIngredient.objects.filter(
+            recipe__shoppingcart__user=user
+        ).values("ingredient").annotate(total=Sum("amount"))
+    }
+    actual = dict(
+        user.shopping_list.filter(total_amount__gt=0)
+        .values_list("ingredient", "total_amount")
+    )
+    assert actual == expected
+
+
+@pytest.mark.parametrize("url", [FAVORITE_URL, CART_URL])
+def test_add_returns_only_inserted(url, reader_client, reader, recipes):
+    present = {recipe.id for recipe in recipes[::3]}
+    requested = [recipe.id for recipe in recipes[:6]]
+    response = reader_client.post(url, {"recipes": requested}, format="json")
+    assert response.status_code == 201
+    assert ids(response) == sorted(set(requested) - present)
+
+    repeated = reader_client.post(
+        url, {"recipes": requested}, format="json"
+    )
+    assert repeated.status_code == 201
+    assert repeated.json() == []
+    assert_favorites_counts()
+    assert_shopping_list(reader)
+
+
+@pytest.mark.parametrize("url", [FAVORITE_URL, CART_URL])
+def test_remove_keeps_counters(url, reader_client, reader, recipes):
+    requested = [recipe.id for recipe in recipes[:6]]
+    response = reader_client.delete(
+        url, {"recipes": requested}, format="json"
+    )
+    assert response.status_code == 200
+    assert ids(response) == [recipe.id for recipe in recipes[:6:3]]
+    model = Favorite if url == FAVORITE_URL else ShoppingCart
+    assert not model.objects.filter(
+        user=reader, recipe_id__in=requested
+    ).exists()
+    assert_favorites_counts()
+    assert_shopping_list(reader)
+
+
+def test_unknown_recipe(reader_client, recipes):
+    response = reader_client.post(
+        FAVORITE_URL, {"recipes": [recipes[1].id, 0]}, format="json"
+    )
+    assert response.status_code == 400
+    assert not Favorite.objects.filter(recipe=recipes[1]).exists()
+
+
+@pytest.mark.parametrize("url", [FAVORITE_URL, CART_URL])
+def test_queries_do_not_grow_with_batch(url, reader_client, recipes):
+    # Рецепты, которых у reader ещё нет ни в избранном, ни в корзине.
+    batches = ([recipes[1]], [recipes[2], recipes[4], recipes[5]])
+    counts = []
+    for method in ("post", "delete"):
+        for batch in batches:
+            with CaptureQueriesContext(connection) as context:
+                response = getattr(reader_client, method)(
+                    url,
+                    {"recipes": [recipe.id for recipe in batch]},
+                    format="json",
+                )
+            assert len(response.json()) == len(batch)
+            counts.append(len(context))
+    assert counts[0] == counts[1]
+    assert counts[2] == counts[3]
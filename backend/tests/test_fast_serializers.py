@@ -0,0 +1,83 @@
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from foodgram_backend.renderers import ORJSONRenderer
+from recipe.models import Ingredient, Tag
+from recipe.serializers import IngredientSerializer, TagSerializer
+from recipe.views import RecipeViewSet
+
+from .conftest import RECIPES_COUNT
+
+RENDERERS = (JSONRenderer(), ORJSONRenderer())
+
+
+@pytest.fixture(params=[True, False], ids=["fast", "drf"])
+def fast_serializers(request, settings):
+    """API с быстрыми сериализаторами и без них."""
+    settings.FAST_SERIALIZERS = request.param
+    settings.RESPONSE_CACHE = False
+    return request.param
+
+
+@pytest.fixture(params=["anonymous", "reader"])
+def user_client(request, anonymous_client, reader_client, reader):
+    if request.param == "anonymous":
+        return AnonymousUser(), anonymous_client
+    return reader, reader_client
+
+
+def recipe_view(user):
+    """RecipeViewSet с запросом от user, как у API."""
+    request = Request(APIRequestFactory().get("/api/recipes/"))
+    request.user = user
+    return RecipeViewSet(
+        request=request, format_kwarg=None, kwargs={}, action="list"
+    )
+
+
+def assert_same_json(actual, expected):
+    """Оба рендерера выдают байты эталона DRF."""
+    reference = JSONRenderer().render(expected)
+    for renderer in RENDERERS:
+        assert renderer.render(actual) == reference, type(renderer).__name__
+
+
+def test_recipe_list(fast_serializers, user_client, recipes):
+    user, client = user_client
+    response = client.get(f"/api/recipes/?limit={RECIPES_COUNT}")
+    assert response.status_code == 200
+    view = recipe_view(user)
+    expected = view.get_serializer(list(view.get_queryset()), many=True).data
+    assert len(expected) == RECIPES_COUNT
+    assert_same_json(response.data["results"], expected)
+    assert response.content == ORJSONRenderer().render(response.data)
+
+
+def test_recipe_detail(fast_serializers, user_client, recipes):
+    user, client = user_client
+    recipe = recipes[1]
+    response = client.get(f"/api/recipes/{recipe.id}/")
+    assert response.status_code == 200
+    view = recipe_view(user)
+    expected = view.get_serializer(view.get_queryset().get(pk=recipe.id)).data
+    assert_same_json(response.data, expected)
+
+
+@pytest.mark.parametrize(
+    "url, model, serializer_class",
+    [
+        ("/api/tags/", Tag, TagSerializer),
+        ("/api/ingredients/", Ingredient, IngredientSerializer),
+    ],
+)
+def test_catalog(fast_serializers, anonymous_client, recipes, url, model,
+                 serializer_class):
+    response = anonymous_client.get(url)
+    assert response.status_code == 200
+    expected = serializer_class(
+        model.objects.order_by(*model._meta.ordering or ["id"]), many=True
+    ).data
+    assert_same_json(response.data, expected)
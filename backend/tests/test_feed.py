@@ -0,0 +1,110 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipe.models import Recipe
+from users import feed
+from users.models import FeedEntry, Subscription
+
+from .conftest import make_user
+
+URL = "/api/recipes/feed/"
+
+
+@pytest.fixture
+def publish(django_capture_on_commit_callbacks):
+    """Публикует рецепты автора с рассылкой по лентам после коммита."""
+    def publish(author, count=1):
+        with django_capture_on_commit_callbacks(execute=True):
+            recipes = [
+                Recipe.objects.create(
+                    author=author, name=f"Рецепт {number}", image="",
+                    text="Описание", cooking_time=1,
+                )
+                for number in range(count)
+            ]
+        return [recipe.id for recipe in recipes]
+    return publish
+
+
+def feed_ids(user):
+    return set(
+        FeedEntry.objects.filter(user=user).values_list("recipe_id", flat=True)
+    )
+
+
+def read_feed(client, limit):
+    """id рецептов всех страниц ленты по ссылкам next."""
+    pages, url = [], f"{URL}?limit={limit}"
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        pages.append([recipe["id"] for recipe in response.json()["results"]])
+        url = response.json()["next"]
+    return pages
+
+
+def test_fan_out(publish, author, reader, reader_client):
+    Subscription.objects.create(user=reader, author=author)
+    ids = publish(author, 2)
+    assert feed_ids(reader) == set(ids)
+    assert read_feed(reader_client, 10) == [sorted(ids, reverse=True)]
+
+
+def test_follow_backfill_and_unfollow(monkeypatch, publish, author, reader):
+    monkeypatch.setattr(feed, "FEED_BACKFILL", 2)
+    ids = publish(author, 3)
+    subscription = Subscription.objects.create(user=reader, author=author)
+    assert feed_ids(reader) == set(ids[-2:])
+    subscription.delete()
+    assert feed_ids(reader) == set()
+
+
+def test_trimmed_on_write(monkeypatch, publish, author, reader,
+                          reader_client):
+    monkeypatch.setattr(feed, "FEED_MAX_ITEMS", 3)
+    Subscription.objects.create(user=reader, author=author)
+    ids = publish(author, 5)
+    assert feed_ids(reader) == set(ids[-3:])
+
+    with CaptureQueriesContext(connection) as context:
+        assert reader_client.get(URL).status_code == 200
+    writes = [
+        query["sql"] for query in context.captured_queries
+        if query["sql"].lstrip().upper().startswith(
+            ("INSERT", "UPDATE", "DELETE")
+        )
+    ]
+    assert writes == []
+
+
+@pytest.fixture
+def big_author(monkeypatch, author, reader):
+    """author с двумя подписчиками при пороге в одного."""
+    monkeypatch.setattr(feed, "FEED_FANOUT_MAX_FOLLOWERS", 1)
+    Subscription.objects.create(user=reader, author=author)
+    Subscription.objects.create(user=make_user("other"), author=author)
+    return author
+
+
+def test_big_author_merged_on_read(publish, big_author, reader,
+                                   reader_client):
+    small = make_user("small")
+    Subscription.objects.create(user=reader, author=small)
+    big_ids = publish(big_author, 3)
+    small_ids = publish(small, 2)
+    assert feed_ids(reader) == set(small_ids)
+
+    pages = read_feed(reader_client, 2)
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert sum(pages, []) == sorted(big_ids + small_ids, reverse=True)
+
+
+def test_backfill_when_author_is_no_longer_big(publish, big_author, reader,
+                                               reader_client):
+    ids = publish(big_author, 2)
+    assert feed_ids(reader) == set()
+
+    Subscription.objects.get(user__username="other").delete()
+    assert feed_ids(reader) == set(ids)
+    assert read_feed(reader_client, 10) == [sorted(ids, reverse=True)]
@@ -0,0 +1,65 @@
+import base64
+import io
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image
+
+from recipe import images
+from recipe.images import Base64ImageField, thumbnail_name
+from recipe.models import Recipe
+
+
+def png_bytes(size=64):
+    buffer = io.BytesIO()
+    Image.new("RGB", (size, size), "green").save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def test_base64_with_line_breaks(monkeypatch):
+    # Части меньше строки base64, чтобы перевод строки попадал внутрь.
+    monkeypatch.setattr(images, "BASE64_CHUNK_SIZE", 8)
+    encoded = base64.encodebytes(png_bytes()).decode()
+    assert "\n" in encoded
+    value = Base64ImageField().to_internal_value(
+        f"data:image/png;base64, {encoded}"
+    )
+    assert value.name.endswith(".png")
+    value.seek(0)
+    assert value.read() == png_bytes()
+
+
+@pytest.fixture
+def recipe_with_image(author, django_capture_on_commit_callbacks):
+    name = default_storage.save("recipes/real.png", ContentFile(png_bytes()))
+    with django_capture_on_commit_callbacks(execute=True):
+        recipe = Recipe.objects.create(
+            author=author, name="Рецепт", image=name, text="Описание",
+            cooking_time=1,
+        )
+    return recipe
+
+
+def test_thumbnail_marked_after_commit(recipe_with_image):
+    recipe_with_image.refresh_from_db()
+    thumbnail = thumbnail_name(recipe_with_image.image.name)
+    assert recipe_with_image.image_thumbnail == thumbnail
+    assert default_storage.exists(thumbnail)
+
+
+@pytest.mark.parametrize("fast", [True, False])
+def test_list_does_not_touch_storage(settings, monkeypatch, fast,
+                                     recipe_with_image, anonymous_client):
+    settings.FAST_SERIALIZERS = fast
+
+    def exists(name):
+        raise AssertionError(f"storage.exists({name!r})")
+
+    monkeypatch.setattr(default_storage, "exists", exists)
+    response = anonymous_client.get("/api/recipes/")
+    assert response.status_code == 200
+    (data,) = response.json()["results"]
+    assert data["image_thumb"].endswith(
+        thumbnail_name(recipe_with_image.image.name)
+    )
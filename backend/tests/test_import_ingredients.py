@@ -0,0 +1,38 @@
+import io
+
+import pytest
+from django.core.management import call_command
+
+from recipe.catalog import catalog
+from recipe.models import Ingredient
+
+
+@pytest.fixture
+def prefix_index(settings):
+    settings.INGREDIENT_PREFIX_INDEX = True
+
+
+def search(client, value):
+    return [
+        (item["name"], item["measurement_unit"])
+        for item in client.get(
+            "/api/ingredients/", {"name": value}
+        ).json()
+    ]
+
+
+def test_import_reaches_running_workers(db, tmp_path, prefix_index,
+                                        anonymous_client):
+    Ingredient.objects.create(name="salt", measurement_unit="g")
+    assert search(anonymous_client, "s") == [("salt", "g")]
+
+    path = tmp_path / "ingredients.csv"
+    path.write_text("salt,kg\nsugar,g\n", encoding="utf-8")
+    # on_commit в тесте не выполняется: для этого процесса импорт
+    # выглядит как команда, запущенная в другом контейнере.
+    call_command("import_ingredients", str(path), stdout=io.StringIO())
+    assert search(anonymous_client, "s") == [("salt", "g")]
+
+    # Фоновый поток справочника сверяет версию в базе.
+    catalog.refresh()
+    assert search(anonymous_client, "s") == [("salt", "kg"), ("sugar", "g")]
@@ -0,0 +1,46 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from foodgram_backend.constants import INGREDIENT_SEARCH_LIMIT
+from recipe.models import Ingredient
+
+# Латиница: LIKE в SQLite не различает регистр только для ASCII.
+
+
+@pytest.fixture
+def sugar(db):
+    Ingredient.objects.bulk_create(
+        Ingredient(name=name, measurement_unit="g")
+        for name in ("sugar powder", "Sugar", "vanilla sugar", "salt")
+    )
+
+
+def search(client, value):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get("/api/ingredients/", {"name": value})
+    assert response.status_code == 200
+    substring_searches = [
+        query for query in context.captured_queries
+        if f"%{value}%".upper() in query["sql"].upper()
+    ]
+    return [item["name"] for item in response.json()], substring_searches
+
+
+def test_prefix_matches_first(sugar, anonymous_client):
+    names, substring_searches = search(anonymous_client, "sug")
+    assert names == ["Sugar", "sugar powder", "vanilla sugar"]
+    assert substring_searches
+
+
+def test_full_prefix_page_skips_substring_search(db, anonymous_client):
+    Ingredient.objects.bulk_create(
+        Ingredient(name=f"flour {number:03}", measurement_unit="g")
+        for number in range(INGREDIENT_SEARCH_LIMIT + 1)
+    )
+    Ingredient.objects.create(name="rice flour", measurement_unit="g")
+    names, substring_searches = search(anonymous_client, "flo")
+    assert names == [
+        f"flour {number:03}" for number in range(INGREDIENT_SEARCH_LIMIT)
+    ]
+    assert not substring_searches
@@ -0,0 +1,70 @@
+import pytest
+from django.test import Client
+from rest_framework import serializers
+
+from foodgram_backend.constants import N_PLUS_ONE_THRESHOLD
+from foodgram_backend.metrics import (RequestStats, current_request,
+                                      record_query)
+
+from .conftest import make_user
+
+URL = "/api/metrics/"
+
+
+@pytest.fixture
+def client():
+    return Client()
+
+
+def test_denied_without_token(settings, client, reader):
+    settings.METRICS_TOKEN = ""
+    assert client.get(URL).status_code == 403
+    client.force_login(reader)
+    assert client.get(URL).status_code == 403
+
+
+def test_staff_allowed(settings, client, db):
+    settings.METRICS_TOKEN = ""
+    admin = make_user("admin")
+    admin.is_staff = True
+    admin.save()
+    client.force_login(admin)
+    response = client.get(URL)
+    assert response.status_code == 200
+    assert b"foodgram_requests_total" in response.content
+
+
+def test_token(settings, client, db):
+    settings.METRICS_TOKEN = "secret"
+    assert client.get(
+        URL, HTTP_AUTHORIZATION="Bearer wrong"
+    ).status_code == 403
+    assert client.get(
+        URL, HTTP_AUTHORIZATION="Bearer secret"
+    ).status_code == 200
+
+
+def test_serializers_not_patched_by_default(client, tags):
+    client.get("/api/tags/")
+    for serializer_class in (
+        serializers.Serializer, serializers.ListSerializer
+    ):
+        prop = serializer_class.__dict__["data"]
+        assert not getattr(prop.fget, "instrumented", False)
+
+
+def test_transaction_statements_not_n_plus_one():
+    stats = RequestStats()
+    token = current_request.set(stats)
+    try:
+        for _ in range(N_PLUS_ONE_THRESHOLD):
+            for sql in (
+                "BEGIN", 'SAVEPOINT "s1"', 'RELEASE SAVEPOINT "s1"',
+                'ROLLBACK TO SAVEPOINT "s1"', "COMMIT", "SELECT 1",
+            ):
+                record_query(lambda *args: None, sql, None, False, {})
+    finally:
+        current_request.reset(token)
+    stats.finish(object())
+    assert stats.queries == 6 * N_PLUS_ONE_THRESHOLD
+    assert stats.repeated == [("SELECT 1", N_PLUS_ONE_THRESHOLD)]
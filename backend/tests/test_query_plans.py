@@ -0,0 +1,82 @@
+import pytest
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+
+from foodgram_backend.constants import PAGINTAION_NUMBER
+from recipe.exports import shopping_list
+from recipe.models import Ingredient, Recipe
+from shopping.models import Favorite, ShoppingCart
+from users.models import Subscription
+
+pytestmark = pytest.mark.skipif(
+    connection.vendor != "postgresql",
+    reason="EXPLAIN проверяется только в PostgreSQL.",
+)
+
+
+def hot_queries(user, author, recipe, tag):
+    """Запросы горячих фильтров и проверок существования."""
+    return {
+        "рецепты по тегу": Recipe.objects.filter(tags__slug=tag.slug),
+        "рецепты автора": Recipe.objects.filter(
+            author=author
+        ).order_by("-id")[:PAGINTAION_NUMBER],
+        "рецепт в избранном": Favorite.objects.filter(
+            user=user, recipe=recipe
+        ),
+        "избранное рецепта": Favorite.objects.filter(recipe=recipe),
+        "рецепт в списке покупок": ShoppingCart.objects.filter(
+            user=user, recipe=recipe
+        ),
+        "рецепты в списке покупок": Recipe.objects.filter(
+            Exists(
+                ShoppingCart.objects.filter(user=user, recipe=OuterRef("pk"))
+            )
+        ),
+        "избранные рецепты": Recipe.objects.filter(
+            Exists(Favorite.objects.filter(user=user, recipe=OuterRef("pk")))
+        ),
+        "список покупок": shopping_list(user),
+        "подписки пользователя": Subscription.objects.filter(
+            user=user
+        ).order_by("created_at", "id")[:PAGINTAION_NUMBER],
+        "подписчики автора": Subscription.objects.filter(
+            author=author
+        ).order_by("created_at")[:PAGINTAION_NUMBER],
+        "подписка на автора": Subscription.objects.filter(
+            user=user, author=author
+        ),
+        "ингредиенты по началу названия": Ingredient.objects.filter(
+            name__istartswith="ингр"
+        ),
+    }
+
+
+QUERY_NAMES = [
+    "рецепты по тегу",
+    "рецепты автора",
+    "рецепт в избранном",
+    "избранное рецепта",
+    "рецепт в списке покупок",
+    "рецепты в списке покупок",
+    "избранные рецепты",
+    "список покупок",
+    "подписки пользователя",
+    "подписчики автора",
+    "подписка на автора",
+    "ингредиенты по началу названия",
+]
+
+
+@pytest.mark.parametrize("name", QUERY_NAMES)
+def test_hot_query_uses_index(recipes, reader, author, tags, name):
+    """
+    С запретом последовательного сканирования план без подходящего
+    индекса всё равно содержит Seq Scan.
+    """
+    queryset = hot_queries(reader, author, recipes[0], tags[1])[name]
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        plan = queryset.explain()
+    assert "Seq Scan" not in plan, plan
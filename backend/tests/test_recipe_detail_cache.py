@@ -0,0 +1,99 @@
+import base64
+import io
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+
+from recipe.images import thumbnail_name
+from recipe.models import Recipe
+
+CACHED_ANONYMOUS_QUERIES = 0
+# Токен и флаги пользователя одним запросом.
+CACHED_AUTHENTICATED_QUERIES = 2
+
+
+@pytest.fixture
+def recipe(settings, recipes):
+    """
+    Рецепт с готовой миниатюрой: карточки с ещё не созданными
+    миниатюрами не кэшируются.
+    """
+    settings.RECIPE_DETAIL_CACHE = True
+    recipe = recipes[1]
+    Recipe.objects.filter(pk=recipe.pk).update(
+        image_thumbnail=thumbnail_name(recipe.image.name)
+    )
+    return recipe
+
+
+def get(client, recipe):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(f"/api/recipes/{recipe.id}/")
+    assert response.status_code == 200
+    return response.json(), len(context)
+
+
+def png_base64():
+    file = io.BytesIO()
+    Image.new("RGB", (4, 4), "red").save(file, "PNG")
+    return (
+        "data:image/png;base64,"
+        + base64.b64encode(file.getvalue()).decode()
+    )
+
+
+def test_cached(recipe, anonymous_client, reader_client):
+    first, _ = get(anonymous_client, recipe)
+    cached, queries = get(anonymous_client, recipe)
+    assert cached == first
+    assert queries == CACHED_ANONYMOUS_QUERIES
+
+    get(reader_client, recipe)
+    flagged, queries = get(reader_client, recipe)
+    assert queries == CACHED_AUTHENTICATED_QUERIES
+    assert flagged["is_favorited"] is False
+    assert flagged["author"]["is_subscribed"] is True
+
+
+def test_ingredient_change(recipe, anonymous_client,
+                           django_capture_on_commit_callbacks):
+    get(anonymous_client, recipe)
+    ingredient = recipe.ingredients.first()
+    with django_capture_on_commit_callbacks(execute=True):
+        ingredient.name = "Renamed ingredient"
+        ingredient.save()
+    data, queries = get(anonymous_client, recipe)
+    assert queries > CACHED_ANONYMOUS_QUERIES
+    assert "Renamed ingredient" in [
+        item["name"] for item in data["ingredients"]
+    ]
+
+
+def test_tag_change(recipe, anonymous_client,
+                    django_capture_on_commit_callbacks):
+    get(anonymous_client, recipe)
+    tag = recipe.tags.first()
+    with django_capture_on_commit_callbacks(execute=True):
+        tag.name = "Renamed tag"
+        tag.save()
+    data, queries = get(anonymous_client, recipe)
+    assert queries > CACHED_ANONYMOUS_QUERIES
+    assert "Renamed tag" in [item["name"] for item in data["tags"]]
+
+
+def test_author_avatar_change(recipe, anonymous_client, author_client,
+                              django_capture_on_commit_callbacks):
+    before, _ = get(anonymous_client, recipe)
+    with django_capture_on_commit_callbacks(execute=True):
+        response = author_client.put(
+            "/api/users/me/avatar/", {"avatar": png_base64()}, format="json"
+        )
+    assert response.status_code == 200
+    data, _ = get(anonymous_client, recipe)
+    assert data["author"]["avatar"] == response.json()["avatar"]
+    assert data["author"]["avatar"] != before["author"]["avatar"]
+    cached, queries = get(anonymous_client, recipe)
+    assert cached == data
+    assert queries == CACHED_ANONYMOUS_QUERIES
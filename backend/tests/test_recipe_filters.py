@@ -0,0 +1,49 @@
+import pytest
+
+from shopping.models import Favorite, ShoppingCart
+
+from .conftest import RECIPES_COUNT
+
+RELATIONS = [
+    ("is_favorited", Favorite),
+    ("is_in_shopping_cart", ShoppingCart),
+]
+
+
+def recipe_ids(client, query):
+    response = client.get(f"/api/recipes/?{query}&limit={RECIPES_COUNT}")
+    assert response.status_code == 200
+    return {recipe["id"] for recipe in response.json()["results"]}
+
+
+@pytest.fixture
+def others_relations(recipes, author):
+    """Рецепты в избранном и списке покупок другого пользователя."""
+    theirs = [recipes[1], recipes[2]]
+    for model in (Favorite, ShoppingCart):
+        model.objects.bulk_create(
+            model(user=author, recipe=recipe) for recipe in theirs
+        )
+    return {recipe.id for recipe in theirs}
+
+
+@pytest.mark.parametrize("name, model", RELATIONS)
+def test_scoped_to_current_user(recipes, reader, reader_client,
+                                others_relations, name, model):
+    own = set(
+        model.objects.filter(user=reader).values_list("recipe_id", flat=True)
+    )
+    assert own and not own & others_relations
+
+    assert recipe_ids(reader_client, f"{name}=1") == own
+    not_related = recipe_ids(reader_client, f"{name}=0")
+    assert not_related == {recipe.id for recipe in recipes} - own
+    assert others_relations <= not_related
+
+
+@pytest.mark.parametrize("name", [name for name, _ in RELATIONS])
+def test_anonymous(recipes, anonymous_client, others_relations, name):
+    assert recipe_ids(anonymous_client, f"{name}=1") == set()
+    assert recipe_ids(anonymous_client, f"{name}=0") == {
+        recipe.id for recipe in recipes
+    }
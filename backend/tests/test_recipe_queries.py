@@ -0,0 +1,73 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# COUNT, страница рецептов, авторы, ингредиенты, теги; авторизованному
+# запросу добавляется поиск токена, фильтру по тегам — поиск тегов.
+ANONYMOUS_QUERIES = 5
+AUTHENTICATED_QUERIES = 6
+TAG_FILTER_QUERIES = 1
+# Карточка без COUNT и без кэша карточек (он требует Redis): флаги
+# пользователя аннотируются в запросе рецепта, плюс запрос токена.
+ANONYMOUS_DETAIL_QUERIES = 4
+AUTHENTICATED_DETAIL_QUERIES = 5
+PAGE_SIZES = (2, 6, 12)
+
+
+def count_queries(client, url):
+    # Первый запрос загружает справочник и кэши Django.
+    client.get("/api/recipes/?limit=1&page=2")
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200, response.content
+    return len(context)
+
+
+@pytest.mark.parametrize("limit", PAGE_SIZES)
+def test_anonymous_list_queries(recipes, anonymous_client, limit):
+    assert count_queries(
+        anonymous_client, f"/api/recipes/?limit={limit}"
+    ) == ANONYMOUS_QUERIES
+
+
+@pytest.mark.parametrize("limit", PAGE_SIZES)
+def test_authenticated_list_queries(recipes, reader_client, limit):
+    assert count_queries(
+        reader_client, f"/api/recipes/?limit={limit}"
+    ) == AUTHENTICATED_QUERIES
+
+
+@pytest.mark.parametrize("limit", PAGE_SIZES)
+@pytest.mark.parametrize("query", ["is_favorited=1", "is_in_shopping_cart=1"])
+def test_user_filter_queries(recipes, reader_client, query, limit):
+    assert count_queries(
+        reader_client, f"/api/recipes/?{query}&limit={limit}"
+    ) == AUTHENTICATED_QUERIES
+
+
+@pytest.mark.parametrize("limit", PAGE_SIZES)
+def test_tag_filter_queries(recipes, anonymous_client, reader_client,
+                            limit):
+    url = f"/api/recipes/?tags=tag-1&tags=tag-2&limit={limit}"
+    assert count_queries(
+        anonymous_client, url
+    ) == ANONYMOUS_QUERIES + TAG_FILTER_QUERIES
+    assert count_queries(
+        reader_client, url
+    ) == AUTHENTICATED_QUERIES + TAG_FILTER_QUERIES
+
+
+def test_detail_queries(recipes, anonymous_client, reader_client):
+    url = f"/api/recipes/{recipes[0].id}/"
+    assert count_queries(anonymous_client, url) == ANONYMOUS_DETAIL_QUERIES
+    assert count_queries(
+        reader_client, url
+    ) == AUTHENTICATED_DETAIL_QUERIES
+
+
+def test_queries_do_not_grow_with_page_size(recipes, reader_client):
+    counts = [
+        count_queries(reader_client, f"/api/recipes/?limit={limit}")
+        for limit in PAGE_SIZES
+    ]
+    assert counts == [AUTHENTICATED_QUERIES] * len(PAGE_SIZES)
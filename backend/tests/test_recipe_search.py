@@ -0,0 +1,103 @@
+import pytest
+from django.db import connection
+
+from recipe.models import Ingredient, Recipe, RecipeIngredient
+from recipe.search import InvertedIndex, update_search_vectors
+
+postgresql_only = pytest.mark.skipif(
+    connection.vendor != "postgresql",
+    reason="search_headline считает только PostgreSQL",
+)
+python_index_only = pytest.mark.skipif(
+    connection.vendor == "postgresql",
+    reason="индекс в памяти нужен только без полнотекстового поиска",
+)
+
+
+def create_recipe(author, name, text, ingredient=None):
+    recipe = Recipe.objects.create(
+        author=author, name=name, text=text, image="", cooking_time=10
+    )
+    if ingredient is not None:
+        RecipeIngredient.objects.create(
+            recipe=recipe, ingredient=ingredient, amount=1
+        )
+    return recipe
+
+
+@pytest.fixture
+def searchable(author):
+    """Слово «борщ» в названии, в описании и в ингредиенте."""
+    ingredient = Ingredient.objects.create(
+        name="Борщ консервированный", measurement_unit="г"
+    )
+    recipes = {
+        "name": create_recipe(author, "Борщ украинский", "Варить два часа"),
+        "text": create_recipe(
+            author, "Суп", "Классический борщ со сметаной"
+        ),
+        "ingredient": create_recipe(
+            author, "Салат", "Нарезать и смешать", ingredient
+        ),
+        "none": create_recipe(author, "Каша", "Овсяная на молоке"),
+    }
+    update_search_vectors([recipe.id for recipe in recipes.values()])
+    return recipes
+
+
+def search(client, query):
+    response = client.get("/api/recipes/", {"search": query})
+    assert response.status_code == 200
+    return response.json()["results"]
+
+
+@pytest.mark.parametrize("fast", [True, False])
+def test_ranking(settings, fast, searchable, anonymous_client):
+    settings.FAST_SERIALIZERS = fast
+    results = search(anonymous_client, "борщ")
+    assert [recipe["id"] for recipe in results] == [
+        searchable["name"].id,
+        searchable["text"].id,
+        searchable["ingredient"].id,
+    ]
+    results = search(anonymous_client, "классический борщ")
+    assert [recipe["id"] for recipe in results] == [searchable["text"].id]
+
+
+@postgresql_only
+@pytest.mark.parametrize("fast", [True, False])
+def test_search_headline(settings, fast, searchable, anonymous_client):
+    settings.FAST_SERIALIZERS = fast
+    headlines = {
+        recipe["id"]: recipe["search_headline"]
+        for recipe in search(anonymous_client, "борщ")
+    }
+    assert "<b>борщ</b>" in headlines[searchable["text"].id]
+    assert "<b>" not in headlines[searchable["name"].id]
+
+
+@python_index_only
+def test_index_built_once(monkeypatch, author, searchable, anonymous_client,
+                          django_capture_on_commit_callbacks):
+    extend = InvertedIndex.extend
+    calls = []
+
+    def counting_extend(self, queryset):
+        calls.append(queryset)
+        extend(self, queryset)
+
+    monkeypatch.setattr(InvertedIndex, "extend", counting_extend)
+    search(anonymous_client, "борщ")
+    search(anonymous_client, "суп")
+    assert len(calls) == 1
+
+    with django_capture_on_commit_callbacks(execute=True):
+        created = create_recipe(author, "Зелёный борщ", "Со щавелем")
+    assert searchable["name"].id in [
+        recipe["id"] for recipe in search(anonymous_client, "борщ")
+    ]
+    assert created.id in [
+        recipe["id"] for recipe in search(anonymous_client, "щавел")
+    ]
+    # Новый рецепт дочитан по одному, без перестройки индекса.
+    assert [queryset.model for queryset in calls[1:]] == [Recipe]
@@ -0,0 +1,63 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipe.models import Tag
+
+
+def get(client, url, **headers):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, **headers)
+    return response, len(context)
+
+
+def test_disabled_without_shared_cache(settings, tags, anonymous_client):
+    settings.RESPONSE_CACHE = False
+    get(anonymous_client, "/api/tags/")
+    response, queries = get(anonymous_client, "/api/tags/")
+    assert queries == 1
+    assert "ETag" not in response
+
+
+def test_cached_until_commit(settings, tags, anonymous_client,
+                             django_capture_on_commit_callbacks):
+    settings.RESPONSE_CACHE = True
+    first, _ = get(anonymous_client, "/api/tags/")
+    cached, queries = get(anonymous_client, "/api/tags/")
+    assert queries == 0
+    assert cached.json() == first.json()
+    assert get(
+        anonymous_client, "/api/tags/", HTTP_IF_NONE_MATCH=first["ETag"]
+    )[0].status_code == 304
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        Tag.objects.create(name="Новый", slug="new")
+    assert get(anonymous_client, "/api/tags/")[0].json() == first.json()
+
+    for callback in callbacks:
+        callback()
+    fresh, queries = get(anonymous_client, "/api/tags/")
+    assert queries == 1
+    assert fresh["ETag"] != first["ETag"]
+    assert "new" in [tag["slug"] for tag in fresh.json()]
+
+
+def test_login_keeps_recipe_list(settings, recipes, author, anonymous_client,
+                                 django_capture_on_commit_callbacks):
+    settings.RESPONSE_CACHE = True
+    first, _ = get(anonymous_client, "/api/recipes/")
+    with django_capture_on_commit_callbacks(execute=True):
+        response = anonymous_client.post(
+            "/api/auth/token/login/",
+            {"email": author.email, "password": "password"},
+        )
+    assert response.status_code == 200, response.content
+    cached, queries = get(anonymous_client, "/api/recipes/")
+    assert queries == 0
+    assert cached["ETag"] == first["ETag"]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        author.first_name = "Renamed"
+        author.save()
+    fresh, queries = get(anonymous_client, "/api/recipes/")
+    assert queries > 0
+    assert fresh["ETag"] != first["ETag"]
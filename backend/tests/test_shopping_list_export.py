@@ -0,0 +1,44 @@
+import csv
+import io
+import json
+
+import pytest
+
+from shopping.models import ShoppingCart
+
+
+@pytest.fixture
+def cart(reader, recipes):
+    ShoppingCart.objects.filter(user=reader).delete()
+    for recipe in recipes[:2]:
+        ShoppingCart.objects.create(user=reader, recipe=recipe)
+
+
+def download(client, export_type):
+    response = client.get(
+        "/api/recipes/download_shopping_cart/", {"type": export_type}
+    )
+    assert response.status_code == 200
+    return b"".join(response.streaming_content).decode()
+
+
+def test_export_formats_agree(cart, reader_client):
+    items = json.loads(download(reader_client, "json"))
+    assert items
+    rows = list(csv.DictReader(io.StringIO(download(reader_client, "csv"))))
+    assert [row["name"] for row in rows] == [item["name"] for item in items]
+    assert [int(row["amount"]) for row in rows] == [
+        item["amount"] for item in items
+    ]
+    text = download(reader_client, "txt")
+    assert all(item["name"] in text for item in items)
+
+
+@pytest.mark.parametrize("export_type", ["pdf", "xlsx"])
+def test_unsupported_format_lists_supported(cart, reader_client,
+                                            export_type):
+    response = reader_client.get(
+        "/api/recipes/download_shopping_cart/", {"type": export_type}
+    )
+    assert response.status_code == 400
+    assert response.json()["supported_types"] == ["txt", "csv", "json"]
@@ -0,0 +1,232 @@
+from django.core.cache import cache
+from django.db import connection
+
+from foodgram_backend.constants import (FEED_BACKFILL, FEED_BIG_AUTHORS_TTL,
+                                        FEED_FANOUT_MAX_FOLLOWERS,
+                                        FEED_MAX_ITEMS)
+from recipe.models import Recipe
+
+from .models import FeedEntry, Subscription, UserProfile
+
+BIG_AUTHORS_KEY = "feed:big-authors"
+
+FAN_OUT_SQL = """
+    INSERT INTO {feed} (user_id, recipe_id, author_id)
+    SELECT user_id, %s, author_id FROM {subscriptions}
+    WHERE author_id = %s
+    ON CONFLICT (user_id, recipe_id) DO NOTHING
+"""
+
+BACKFILL_SQL = """
+    INSERT INTO {feed} (user_id, recipe_id, author_id)
+    SELECT subscription.user_id, recipe.id, recipe.author_id
+    FROM {subscriptions} subscription
+    JOIN (
+        SELECT id, author_id FROM {recipes}
+        WHERE author_id = %s ORDER BY id DESC LIMIT %s
+    ) recipe ON recipe.author_id = subscription.author_id
+    ON CONFLICT (user_id, recipe_id) DO NOTHING
+"""
+
+TRIM_SQL = """
+    DELETE FROM {feed} WHERE id IN (
+        SELECT id FROM (
+            SELECT entry.id, ROW_NUMBER() OVER (
+                PARTITION BY entry.user_id ORDER BY entry.recipe_id DESC
+            ) AS position
+            FROM {feed} entry
+            JOIN {subscriptions} subscription
+                ON subscription.user_id = entry.user_id
+            WHERE subscription.author_id = %s
+        ) ranked
+        WHERE position > %s
+    )
+"""
+
+REBUILD_SQL = """
+    INSERT INTO {feed} (user_id, recipe_id, author_id)
+    SELECT user_id, recipe_id, author_id FROM (
+        SELECT subscription.user_id, recipe.id AS recipe_id,
+               recipe.author_id,
+               ROW_NUMBER() OVER (
+                   PARTITION BY subscription.user_id ORDER BY recipe.id DESC
+               ) AS position
+        FROM {subscriptions} subscription
+        JOIN {recipes} recipe ON recipe.author_id = subscription.author_id
+        WHERE subscription.user_id IN ({users}){exclude}
+    ) ranked
+    WHERE position <= %s
+    ON CONFLICT (user_id, recipe_id) DO NOTHING
+"""
+
+
+def tables():
+    quote = connection.ops.quote_name
+    return {
+        "feed": quote(FeedEntry._meta.db_table),
+        "subscriptions": quote(Subscription._meta.db_table),
+        "recipes": quote(Recipe._meta.db_table),
+    }
+
+
+def big_authors():
+    """
+    id авторов, у которых больше FEED_FANOUT_MAX_FOLLOWERS подписчиков.
+    Их рецепты не рассылаются по лентам, а подмешиваются при чтении.
+    """
+    return cache.get_or_set(
+        BIG_AUTHORS_KEY,
+        lambda: set(
+            UserProfile.objects.filter(
+                followers_count__gt=FEED_FANOUT_MAX_FOLLOWERS
+            ).values_list("user_id", flat=True)
+        ),
+        FEED_BIG_AUTHORS_TTL,
+    )
+
+
+def is_big_author(author_id):
+    """
+    Проверка по базе, а не по кэшу big_authors(): иначе рецепты,
+    опубликованные, пока кэш устарел, не попали бы ни в ленты, ни в
+    подмешивание при чтении.
+    """
+    return UserProfile.objects.filter(
+        user_id=author_id, followers_count__gt=FEED_FANOUT_MAX_FOLLOWERS
+    ).exists()
+
+
+def trim_followers(cursor, author_id):
+    """
+    Оставляет в лентах подписчиков автора не больше FEED_MAX_ITEMS
+    последних рецептов. Ленты обрезаются при записи, чтобы чтение
+    ленты не писало в базу.
+    """
+    cursor.execute(
+        TRIM_SQL.format(**tables()), [author_id, FEED_MAX_ITEMS]
+    )
+
+
+def fan_out(recipe):
+    """Рассылает новый рецепт в ленты подписчиков автора."""
+    if is_big_author(recipe.author_id):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            FAN_OUT_SQL.format(**tables()), [recipe.pk, recipe.author_id]
+        )
+        trim_followers(cursor, recipe.author_id)
+
+
+def followers_changed(author_id, delta):
+    """
+    Вызывается после изменения числа подписчиков автора. Переход через
+    FEED_FANOUT_MAX_FOLLOWERS сбрасывает кэш крупных авторов, а автор,
+    переставший быть крупным, дописывает последние рецепты в ленты
+    подписчиков: опубликованные без рассылки иначе пропали бы из лент.
+    """
+    boundary = FEED_FANOUT_MAX_FOLLOWERS + (1 if delta > 0 else 0)
+    if not UserProfile.objects.filter(
+        user_id=author_id, followers_count=boundary
+    ).exists():
+        return
+    cache.delete(BIG_AUTHORS_KEY)
+    if delta < 0:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                BACKFILL_SQL.format(**tables()), [author_id, FEED_BACKFILL]
+            )
+            trim_followers(cursor, author_id)
+
+
+def follow(user_id, author_id):
+    """Добавляет в ленту нового подписчика последние рецепты автора."""
+    if is_big_author(author_id):
+        return
+    FeedEntry.objects.bulk_create(
+        [
+            FeedEntry(
+                user_id=user_id, recipe_id=recipe_id, author_id=author_id
+            )
+            for recipe_id in Recipe.objects.filter(author_id=author_id)
+            .order_by("-id")
+            .values_list("id", flat=True)[:FEED_BACKFILL]
+        ],
+        ignore_conflicts=True,
+    )
+    trim(user_id)
+
+
+def unfollow(user_id, author_id):
+    FeedEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def trim(user_id):
+    """Оставляет в ленте не больше FEED_MAX_ITEMS последних рецептов."""
+    first_dropped = (
+        FeedEntry.objects.filter(user_id=user_id)
+        .order_by("-recipe_id")
+        .values_list("recipe_id", flat=True)[
+            FEED_MAX_ITEMS:FEED_MAX_ITEMS + 1
+        ]
+        .first()
+    )
+    if first_dropped is not None:
+        FeedEntry.objects.filter(
+            user_id=user_id, recipe_id__lte=first_dropped
+        ).delete()
+
+
+def rebuild(user_ids):
+    """Пересобирает ленты пользователей по их подпискам."""
+    user_ids = list(user_ids)
+    excluded = list(big_authors())
+    exclude = (
+        f" AND subscription.author_id NOT IN "
+        f"({', '.join(['%s'] * len(excluded))})"
+        if excluded else ""
+    )
+    FeedEntry.objects.filter(user_id__in=user_ids).delete()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            REBUILD_SQL.format(
+                users=", ".join(["%s"] * len(user_ids)),
+                exclude=exclude,
+                **tables(),
+            ),
+            [*user_ids, *excluded, FEED_MAX_ITEMS],
+        )
+
+
+def feed_page(user, limit, before=None):
+    """
+    id рецептов страницы ленты, новые первыми, и есть ли следующая.
+    Стоимость зависит от размера страницы и числа крупных авторов в
+    подписках, но не от общего числа подписок.
+    """
+    entries = FeedEntry.objects.filter(user=user)
+    if before is not None:
+        entries = entries.filter(recipe_id__lt=before)
+    ids = set(
+        entries.order_by("-recipe_id").values_list(
+            "recipe_id", flat=True
+        )[:limit + 1]
+    )
+    big = big_authors()
+    if big:
+        followed = list(
+            Subscription.objects.filter(
+                user=user, author_id__in=big
+            ).values_list("author_id", flat=True)
+        )
+        if followed:
+            recipes = Recipe.objects.filter(author_id__in=followed)
+            if before is not None:
+                recipes = recipes.filter(id__lt=before)
+            ids.update(
+                recipes.order_by("-id").values_list("id", flat=True)[
+                    :limit + 1
+                ]
+            )
+    ordered = sorted(ids, reverse=True)
+    return ordered[:limit], len(ordered) > limit
@@ -0,0 +1,52 @@
+# Generated by Django 3.2.3 on 2026-10-18 20:02
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_subquery(model, field, outer_field):
+    # Копия recipe.counters.count_subquery: миграция не зависит от
+    # текущего кода приложения.
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef(outer_field)})
+            .order_by()
+            .values(field)
+            .annotate(total=Count("pk"))
+            .values("total")
+        ),
+        0,
+    )
+
+
+def fill_profile_counters(apps, schema_editor):
+    UserProfile = apps.get_model("users", "UserProfile")
+    Recipe = apps.get_model("recipe", "Recipe")
+    Subscription = apps.get_model("users", "Subscription")
+    UserProfile.objects.update(
+        recipes_count=count_subquery(Recipe, "author", "user_id"),
+        followers_count=count_subquery(Subscription, "author", "user_id"),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_alter_userprofile_avatar'),
+        ('recipe', '0006_recipe_favorites_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Число подписчиков'),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='recipes_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Число рецептов'),
+        ),
+        migrations.RunPython(fill_profile_counters, migrations.RunPython.noop),
+    ]
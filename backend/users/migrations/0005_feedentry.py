@@ -0,0 +1,84 @@
+# Generated by Django 3.2.3 on 2026-10-18 20:30
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Копии foodgram_backend.constants, shopping.aggregates.batches и
+# users.feed.REBUILD_SQL на момент создания миграции: миграция не
+# зависит от текущего кода приложения.
+FEED_MAX_ITEMS = 500
+BATCH_SIZE = 1000
+
+REBUILD_SQL = """
+    INSERT INTO {feed} (user_id, recipe_id, author_id)
+    SELECT user_id, recipe_id, author_id FROM (
+        SELECT subscription.user_id, recipe.id AS recipe_id,
+               recipe.author_id,
+               ROW_NUMBER() OVER (
+                   PARTITION BY subscription.user_id ORDER BY recipe.id DESC
+               ) AS position
+        FROM {subscriptions} subscription
+        JOIN {recipes} recipe ON recipe.author_id = subscription.author_id
+        WHERE subscription.user_id IN ({users})
+    ) ranked
+    WHERE position <= %s
+    ON CONFLICT (user_id, recipe_id) DO NOTHING
+"""
+
+
+def batches(values):
+    values = list(values)
+    for start in range(0, len(values), BATCH_SIZE):
+        yield values[start:start + BATCH_SIZE]
+
+
+def fill_feeds(apps, schema_editor):
+    Subscription = apps.get_model("users", "Subscription")
+    quote = schema_editor.connection.ops.quote_name
+    users = sorted(set(Subscription.objects.values_list("user_id", flat=True)))
+    with schema_editor.connection.cursor() as cursor:
+        for user_ids in batches(users):
+            cursor.execute(
+                REBUILD_SQL.format(
+                    feed=quote(apps.get_model("users", "FeedEntry")._meta.db_table),
+                    subscriptions=quote(Subscription._meta.db_table),
+                    recipes=quote(apps.get_model("recipe", "Recipe")._meta.db_table),
+                    users=", ".join(["%s"] * len(user_ids)),
+                ),
+                [*user_ids, FEED_MAX_ITEMS],
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipe', '0008_hot_filter_indexes'),
+        ('users', '0004_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='recipe.recipe', verbose_name='Рецепт')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Запись ленты',
+                'verbose_name_plural': 'Лента подписок',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['user', 'author'], name='feed_user_author_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='feedentry',
+            constraint=models.UniqueConstraint(fields=('user', 'recipe'), name='unique_feed_entry'),
+        ),
+        migrations.RunPython(fill_feeds, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from recipe.models import Recipe, safe_update_fields
+
 User = get_user_model()
 
 
@@ -31,6 +33,16 @@ class Subscription(models.Model):
                 name="unique_subscribe"
             )
         ]
+        indexes = [
+            models.Index(
+                fields=["author", "created_at"],
+                name="subscription_author_date_idx",
+            ),
+            models.Index(
+                fields=["user", "created_at", "id"],
+                name="subscription_user_date_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.username} подписан на {self.author.username}"
@@ -42,6 +54,72 @@ class UserProfile(models.Model):
         User, on_delete=models.CASCADE, related_name="profile"
     )
     avatar = models.ImageField(upload_to="users/", blank=True, null=True)
+    avatar_thumbnail = models.CharField(
+        max_length=255,
+        blank=True,
+        editable=False,
+        verbose_name="Готовая миниатюра аватара",
+    )
+    recipes_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Число рецептов"
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Число подписчиков"
+    )
+
+    maintained_fields = (
+        "recipes_count", "followers_count", "avatar_thumbnail"
+    )
 
     def __str__(self):
         return f"Profile of {self.user.username}"
+
+    def save(self, *args, **kwargs):
+        """Сохранение без перезаписи счётчиков."""
+        kwargs.setdefault(
+            "update_fields", safe_update_fields(self)
+        )
+        super().save(*args, **kwargs)
+
+
+class FeedEntry(models.Model):
+    """
+    Рецепт в ленте подписок пользователя. Записи рассылаются при
+    публикации рецепта; рецепты авторов с большим числом подписчиков
+    сюда не попадают и подмешиваются при чтении ленты.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="feed_entries",
+        verbose_name="Пользователь",
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name="feed_entries",
+        verbose_name="Рецепт",
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="Автор",
+    )
+
+    class Meta:
+        verbose_name = "Запись ленты"
+        verbose_name_plural = "Лента подписок"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "recipe"], name="unique_feed_entry"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "author"], name="feed_user_author_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.recipe_id} в ленте {self.user_id}"
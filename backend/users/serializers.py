@@ -1,20 +1,34 @@
 from django.contrib.auth.models import User as DjoserUser
-from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 from rest_framework.validators import ValidationError
 
-from foodgram_backend.constants import NAME_LENGTH, REGISTRATION_NAME
+from foodgram_backend.constants import (NAME_LENGTH, RECIPES_LIMIT_MAX,
+                                        REGISTRATION_NAME)
+from recipe.images import Base64ImageField, ThumbnailField
 from recipe.models import Recipe
 
 from .models import Subscription, User, UserProfile
 
 
+def get_recipes_limit(request):
+    """Проверенное и ограниченное сверху значение recipes_limit."""
+    value = request.query_params.get("recipes_limit")
+    if value is None:
+        return RECIPES_LIMIT_MAX
+    try:
+        limit = serializers.IntegerField(min_value=0).run_validation(value)
+    except ValidationError as error:
+        raise ValidationError({"recipes_limit": error.detail})
+    return min(limit, RECIPES_LIMIT_MAX)
+
+
 class RecipeShortSerializer(serializers.ModelSerializer):
     """Сериализатор короткой информации о рецетпе."""
+    image_thumb = ThumbnailField("image", "image_thumbnail")
 
     class Meta:
         model = Recipe
-        fields = ["id", "name", "image", "cooking_time"]
+        fields = ["id", "name", "image", "image_thumb", "cooking_time"]
 
 
 class AvatarSerializer(serializers.ModelSerializer):
@@ -37,6 +51,9 @@ class AuthorSerializer(serializers.ModelSerializer):
 
     is_subscribed = serializers.SerializerMethodField()
     avatar = Base64ImageField(source="profile.avatar")
+    avatar_thumb = ThumbnailField(
+        "avatar", "avatar_thumbnail", source="profile"
+    )
 
     class Meta:
         model = User
@@ -47,11 +64,14 @@ class AuthorSerializer(serializers.ModelSerializer):
             "first_name",
             "last_name",
             "is_subscribed",
-            "avatar"
+            "avatar",
+            "avatar_thumb",
         ]
 
     def get_is_subscribed(self, obj):
         """Проверяет, подписан ли текущий пользователь на автора."""
+        if hasattr(obj, "is_subscribed"):
+            return obj.is_subscribed
         user = self.context["request"].user
         if user.is_authenticated:
             return user.subscriptions.filter(author=obj).exists()
@@ -62,6 +82,9 @@ class SubscribeReadSerializator(serializers.ModelSerializer):
     """Сериализатор вывода информации о подписках."""
     is_subscribed = serializers.SerializerMethodField()
     avatar = Base64ImageField(source="profile.avatar")
+    avatar_thumb = ThumbnailField(
+        "avatar", "avatar_thumbnail", source="profile"
+    )
     recipes = serializers.SerializerMethodField()
     recipes_count = serializers.SerializerMethodField()
 
@@ -75,31 +98,33 @@ class SubscribeReadSerializator(serializers.ModelSerializer):
             "last_name",
             "is_subscribed",
             "avatar",
+            "avatar_thumb",
             "recipes",
             "recipes_count"
         ]
 
     def get_recipes(self, obj):
         """Получение рецептов."""
-        request = self.context.get("request")
-        if not request:
-            return []
-
-        limit = request.query_params.get("recipes_limit")
-        recipes = obj.recipes.all()
-        if limit:
-            recipes = recipes[: int(limit)]
+        if hasattr(obj, "recipes_preview"):
+            recipes = obj.recipes_preview
+        else:
+            request = self.context.get("request")
+            if not request:
+                return []
+            recipes = obj.recipes.all()[:get_recipes_limit(request)]
         return RecipeShortSerializer(recipes, many=True).data
 
     def get_is_subscribed(self, obj):
         """Проверяет, подписан ли текущий пользователь на автора."""
+        if hasattr(obj, "is_subscribed"):
+            return obj.is_subscribed
         user = self.context["request"].user
         if user.is_authenticated:
             return user.subscriptions.filter(author=obj).exists()
         return False
 
     def get_recipes_count(self, obj):
-        return len(obj.recipes.all())
+        return obj.profile.recipes_count
 
 
 class SubscribeSerializator(serializers.ModelSerializer):
@@ -111,9 +136,11 @@ class SubscribeSerializator(serializers.ModelSerializer):
 
     def to_representation(self, instance):
         """Репрезентация данных."""
-        serializer = SubscribeReadSerializator(
-            instance.author, context=self.context
+        author = instance.author
+        author.is_subscribed = (
+            instance.user_id == self.context["request"].user.id
         )
+        serializer = SubscribeReadSerializator(author, context=self.context)
         return serializer.data
 
 
@@ -1,8 +1,14 @@
 from django.conf import settings
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from .models import UserProfile
+from recipe.images import schedule_thumbnail
+from recipe.models import Recipe
+
+from . import feed
+from .models import Subscription, UserProfile
 
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
@@ -12,5 +18,65 @@ def create_user_profile(sender, instance, created, **kwargs):
 
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
-def save_user_profile(sender, instance, **kwargs):
-    instance.profile.save()
+def save_user_profile(sender, instance, update_fields, **kwargs):
+    # Вход в систему меняет только last_login, профиль не затрагивается.
+    if update_fields != {"last_login"}:
+        instance.profile.save()
+
+
+@receiver(post_save, sender=UserProfile)
+def create_avatar_thumbnail(sender, instance, **kwargs):
+    schedule_thumbnail(instance, "avatar", "avatar_thumbnail")
+
+
+def change_profile_counter(user_id, field, delta):
+    """Атомарно изменяет счётчик профиля, не опуская его ниже нуля."""
+    profiles = UserProfile.objects.filter(user_id=user_id)
+    if delta < 0:
+        profiles = profiles.filter(**{f"{field}__gte": -delta})
+    profiles.update(**{field: F(field) + delta})
+
+
+@receiver(post_save, sender=Recipe)
+def increment_recipes_count(sender, instance, created, **kwargs):
+    if created:
+        change_profile_counter(instance.author_id, "recipes_count", 1)
+
+
+@receiver(post_delete, sender=Recipe)
+def decrement_recipes_count(sender, instance, **kwargs):
+    change_profile_counter(instance.author_id, "recipes_count", -1)
+
+
+@receiver(post_save, sender=Subscription)
+def increment_followers_count(sender, instance, created, **kwargs):
+    if created:
+        # Блокировка строки профиля до конца транзакции: переход через
+        # порог подписчиков увидит ровно одно изменение.
+        with transaction.atomic():
+            change_profile_counter(instance.author_id, "followers_count", 1)
+            feed.followers_changed(instance.author_id, 1)
+
+
+@receiver(post_delete, sender=Subscription)
+def decrement_followers_count(sender, instance, **kwargs):
+    with transaction.atomic():
+        change_profile_counter(instance.author_id, "followers_count", -1)
+        feed.followers_changed(instance.author_id, -1)
+
+
+@receiver(post_save, sender=Recipe)
+def fan_out_recipe(sender, instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: feed.fan_out(instance))
+
+
+@receiver(post_save, sender=Subscription)
+def fill_follower_feed(sender, instance, created, **kwargs):
+    if created:
+        feed.follow(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Subscription)
+def clear_follower_feed(sender, instance, **kwargs):
+    feed.unfollow(instance.user_id, instance.author_id)
@@ -1,14 +1,17 @@
+from django.db.models import OuterRef, Prefetch, Subquery
 from djoser.views import UserViewSet
 from rest_framework import status
 from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 
-from recipe.paginations import CustomPagination
+from recipe.models import Recipe
+from recipe.paginations import (CustomPagination, SubscriptionCursorPagination,
+                                use_cursor_pagination)
 
 from .models import Subscription, User
 from .serializers import (AuthorSerializer, AvatarSerializer,
-                          SubscribeSerializator)
+                          SubscribeSerializator, get_recipes_limit)
 
 
 class CustomUserViewSet(UserViewSet):
@@ -134,9 +137,37 @@ class CustomUserViewSet(UserViewSet):
     def subscriptions(self, request):
         """Получение списка подписок текущего пользователя."""
         user = request.user
-        subscriptions = Subscription.objects.filter(user=user)
+        limit = get_recipes_limit(request)
+        if limit:
+            recipes = Recipe.objects.filter(
+                pk__in=Subquery(
+                    Recipe.objects.filter(author=OuterRef("author"))
+                    .order_by("-id")
+                    .values("pk")[:limit]
+                )
+            )
+        else:
+            recipes = Recipe.objects.none()
+        subscriptions = (
+            Subscription.objects.filter(user=user)
+            .select_related("author__profile")
+            .prefetch_related(
+                Prefetch(
+                    "author__recipes",
+                    queryset=recipes.only(
+                        "id", "name", "image", "image_thumbnail",
+                        "cooking_time", "author_id",
+                    ),
+                    to_attr="recipes_preview",
+                )
+            )
+            .order_by("created_at", "id")
+        )
 
-        paginator = CustomPagination()
+        if use_cursor_pagination(request):
+            paginator = SubscriptionCursorPagination()
+        else:
+            paginator = CustomPagination()
         page = paginator.paginate_queryset(subscriptions, request)
         serializer = SubscribeSerializator(
             page, many=True, context={"request": request}